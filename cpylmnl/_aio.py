@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import os, errno, fcntl, time, asyncio
+
+from .linux import netlinkh as netlink
+from . import _socket
+from . import _nlmsg
+from . import _pool
+
+"""
+asyncio integration, requires Python >= 3.6
+"""
+
+class AsyncSocket(object):
+    """netlink socket driven by asyncio event loop
+
+    This does not own the mnl socket, the caller opens, binds and closes it.
+    The socket fd is set to non-blocking and a reader of it is added to the
+    loop while any request, dump or messages() waits for, so that many
+    AsyncSockets e.g. route, link and conntrack can be multiplexed in a loop.
+
+    The reader receives every datagram and dispatches the messages. Data
+    and control messages of requests are routed to the waiting request by
+    sequence number and portID. Others, like multicast events, are queued
+    to be yielded by messages(). Messages are Nlmsghdr sharing a BufferPool
+    lease. The queue holds at most backlog messages, received while requests
+    wait or while messages() is slow, and more are dropped so that leases
+    return to the pool. A receive error, e.g. ENOBUFS, is raised in all of
+    the waiting requests, and in messages() only if it is iterated then.
+
+	- dropped: messages and errors dropped, not yielded by messages()
+    """
+    def __init__(self, nl, loop=None, pool=None, backlog=1024):
+        """create new instance
+
+        @type nl: c_void_p
+        @param nl: bound mnl socket from socket_open()
+        @type loop: asyncio event loop
+        @param loop: loop to add reader, the running loop if None
+        @type pool: BufferPool
+        @param pool: pool to receive into
+        @type backlog: number
+        @param backlog: max number of messages queued for messages()
+        """
+        self.nl = nl
+        self.fd = _socket.socket_get_fd(nl)
+        self.portid = _socket.socket_get_portid(nl)
+        flags = fcntl.fcntl(self.fd, fcntl.F_GETFL)
+        fcntl.fcntl(self.fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        self._loop = loop
+        self.pool = pool or _pool.BufferPool()
+        self.backlog = backlog
+        self.dropped = 0
+        self._seq = int(time.time())
+        self._queues = {}	# seq: asyncio.Queue of a request
+        self._events = None	# asyncio.Queue of messages(), created in loop
+        self._discard = set()	# seq of requests given up
+        self._nwaiters = 0
+        self._nconsumers = 0	# messages() iterating
+        self._reader_loop = None
+
+
+    def next_seq(self):
+        """allocate a sequence number, never 0
+        """
+        self._seq = (self._seq + 1) & 0xffffffff or 1
+        return self._seq
+
+
+    def _event_queue(self):
+        if self._events is None:
+            self._events = asyncio.Queue(self.backlog)
+        return self._events
+
+
+    def _put_event(self, m):
+        try:
+            self._event_queue().put_nowait(m)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+    def _attach(self):
+        # the reader is added by the first waiter
+        if self._nwaiters == 0:
+            self._reader_loop = self._loop or asyncio.get_event_loop()
+            self._reader_loop.add_reader(self.fd, self._on_readable)
+        self._nwaiters += 1
+
+
+    def _detach(self):
+        # and removed by the last
+        self._nwaiters -= 1
+        if self._nwaiters == 0:
+            self._reader_loop.remove_reader(self.fd)
+            self._reader_loop = None
+
+
+    def _on_readable(self):
+        while True:
+            try:
+                buf = _socket.socket_recv_auto(self.nl, self.pool)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                for q in self._queues.values():
+                    q.put_nowait(e)
+                if self._nconsumers:
+                    self._put_event(e)
+                else:
+                    # not to raise it long after
+                    self.dropped += 1
+                return
+            for nlh in _nlmsg.nlmsg_iter(buf):
+                self._dispatch(nlh)
+
+
+    def _dispatch(self, nlh):
+        seq = nlh.nlmsg_seq
+        if (seq in self._queues or seq in self._discard) \
+           and _nlmsg.nlmsg_portid_ok(nlh, self.portid):
+            q = self._queues.get(seq)
+            if q is not None:
+                q.put_nowait(nlh)
+            elif nlh.nlmsg_type in (netlink.NLMSG_DONE, netlink.NLMSG_ERROR):
+                # the rest of the request given up has been discarded
+                self._discard.remove(seq)
+            return
+        self._put_event(nlh)
+
+
+    async def messages(self):
+        """iterate over received messages, like multicast events
+
+        @rtype: async generator of Nlmsghdr
+        """
+        q = self._event_queue()
+        self._attach()
+        self._nconsumers += 1
+        try:
+            while True:
+                m = await q.get()
+                if isinstance(m, Exception):
+                    raise m
+                yield m
+        finally:
+            self._nconsumers -= 1
+            self._detach()
+
+
+    async def _replies(self, nlh):
+        # yields messages replied to nlh
+        seq = nlh.nlmsg_seq = self.next_seq()
+        q = self._queues[seq] = asyncio.Queue()
+        self._attach()
+        done = False
+        try:
+            _socket.socket_send_nlmsg(self.nl, nlh)
+            interrupted = False
+            while True:
+                rh = await q.get()
+                if isinstance(rh, Exception):
+                    raise rh
+                if rh.nlmsg_flags & netlink.NLM_F_DUMP_INTR:
+                    # the kernel continues the dump, drain it before raising
+                    interrupted = True
+                if rh.nlmsg_type == netlink.NLMSG_ERROR:
+                    done = True
+                    err = _nlmsg.nlmsg_get_payload_as(rh, netlink.Nlmsgerr)
+                    if err.error != 0:
+                        en = abs(err.error)
+                        raise OSError(en, errno.errorcode[en])
+                    break
+                if rh.nlmsg_type == netlink.NLMSG_DONE:
+                    done = True
+                    break
+                if not interrupted and rh.nlmsg_type >= netlink.NLMSG_MIN_TYPE:
+                    yield rh
+            if interrupted:
+                raise OSError(errno.EINTR, errno.errorcode[errno.EINTR])
+        finally:
+            del self._queues[seq]
+            self._detach()
+            while not done and not q.empty():
+                rh = q.get_nowait()
+                done = not isinstance(rh, Exception) \
+                       and rh.nlmsg_type in (netlink.NLMSG_DONE, netlink.NLMSG_ERROR)
+            if not done:
+                # closed halfway, the rest must not be taken as events
+                self._discard.add(seq)
+
+
+    async def request(self, nlh):
+        """send a request and wait for its acknowledgement
+
+        NLM_F_ACK is set and the sequence number is allocated. Raises OSError
+        if the kernel replies an error.
+
+        @type nlh: Nlmsghdr
+        @param nlh: request message
+
+        @rtype: list of Nlmsghdr
+        @return: data messages replied before the acknowledgement
+        """
+        nlh.nlmsg_flags |= netlink.NLM_F_ACK
+        return [rh async for rh in self._replies(nlh)]
+
+
+    def dump(self, nlh):
+        """send a dump request and iterate over the replies until NLMSG_DONE
+
+        The sequence number is allocated. Raises OSError with EINTR if the
+        dump was interrupted, after the rest of it is drained, or errno the
+        kernel replied. The rest of a dump closed halfway is discarded.
+
+        @type nlh: Nlmsghdr
+        @param nlh: dump request message, NLM_F_DUMP is set
+
+        @rtype: async generator of Nlmsghdr
+        """
+        nlh.nlmsg_flags |= netlink.NLM_F_DUMP
+        return self._replies(nlh)
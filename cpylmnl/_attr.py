@@ -2,9 +2,10 @@
 
 from __future__ import absolute_import, print_function
 
-import sys, os, errno, ctypes
+import sys, os, errno, ctypes, struct, socket
 
 from .linux import netlinkh as netlink
+from . import nlstruct
 
 from . import _cproto
 from . import _libmnlh
@@ -26,10 +27,10 @@ attr_get_payload_len	= _cproto.c_attr_get_payload_len
 # void *mnl_attr_get_payload(const struct nlattr *attr)
 attr_get_payload	= _cproto.c_attr_get_payload
 def attr_get_payload_v(attr):
-    return ctypes.cast(_cproto.c_attr_get_payload(attr),
-                ctypes.POINTER(ctypes.c_ubyte * (attr.nla_len - _libmnlh.MNL_ATTR_HDRLEN))).contents
+    return nlstruct.ubyte_array_at(_cproto.c_attr_get_payload(attr),
+                                   attr.nla_len - _libmnlh.MNL_ATTR_HDRLEN)
 def attr_get_payload_as(attr, cls):
-    return ctypes.cast(_cproto.c_attr_get_payload(attr), ctypes.POINTER(cls)).contents
+    return cls.from_address(_cproto.c_attr_get_payload(attr))
 
 # bool mnl_attr_ok(const struct nlattr *attr, int len)
 attr_ok			= _cproto.c_attr_ok
@@ -88,7 +89,7 @@ def attr_parse_payload(payload, cb, data):
     This function propagates the return value of the callback, which can be
     MNL_CB_OK or MNL_CB_STOP, raises OSError in case of MNL_CB_ERROR.
 
-    @type payload: buffer
+    @type payload: buffer (bytearray, memoryview)
     @param payload: payload of the Netlink message
     @type cb: mnl_attr_cb_t or attr_cb decorator can be used
     @param cb: callback function that is called for each attribute
@@ -98,11 +99,147 @@ def attr_parse_payload(payload, cb, data):
     @rtype: number
     @return MNL_CB_ERROR, MNL_CB_OK or MNL_CB_STOP
     """
-    b = (ctypes.c_ubyte * len(payload)).from_buffer(payload)
+    b = _cproto.buffer_ref(payload)
     ret = _cproto.c_attr_parse_payload(b, len(payload), cb, data)
     if ret < 0: raise _cproto.os_error()
     return ret
 
+# not in libmnl
+_nlattr_struct = struct.Struct("=HH")
+_nlmsghdr_len = struct.Struct("=I")
+
+def _attr_walk(v, offset, end):
+    # yields (type masked by NLA_TYPE_MASK, offset, nla_len) of attributes in
+    # v[offset:end], stops at the first one which mnl_attr_ok() fails
+    unpack_from = _nlattr_struct.unpack_from
+    hdrlen = _libmnlh.MNL_ATTR_HDRLEN
+    mask = netlink.NLA_TYPE_MASK
+    while end - offset >= hdrlen:
+        nla_len, nla_type = unpack_from(v, offset)
+        if nla_len < hdrlen or nla_len > end - offset:
+            return
+        yield nla_type & mask, offset, nla_len
+        offset += _libmnlh.MNL_ALIGN(nla_len)
+
+
+def attr_iter_payload(payload):
+    """iterate over attributes in payload without callback
+
+    Attributes are walked the same as mnl_attr_for_each_payload() in python,
+    stopping at the first one which mnl_attr_ok() fails.
+
+    @type payload: buffer (bytearray, memoryview)
+    @param payload: payload of the Netlink message
+
+    @rtype: generator of (number, memoryview)
+    @return: attribute type masked by NLA_TYPE_MASK and its payload view
+    """
+    v = memoryview(payload)
+    hdrlen = _libmnlh.MNL_ATTR_HDRLEN
+    for nla_type, offset, nla_len in _attr_walk(v, 0, len(v)):
+        yield nla_type, v[offset + hdrlen:offset + nla_len]
+
+
+def attr_iter(nlh, offset):
+    """iterate over attributes of Netlink message without callback
+
+    @type nlh: Nlmsghdr
+    @param nlh: Netlink message
+    @type offset: number
+    @param offset: offset to the attributes from the payload
+
+    @rtype: generator of (number, memoryview)
+    @return: see attr_iter_payload()
+    """
+    v = nlh.view()
+    return attr_iter_payload(v[_libmnlh.MNL_NLMSG_HDRLEN + _libmnlh.MNL_ALIGN(offset):])
+
+
+def attr_iter_nested(attr):
+    """iterate over attributes nested in attr without callback
+
+    @type attr: Nlattr or buffer
+    @param attr: nested attribute, or its payload yielded by attr_iter()
+
+    @rtype: generator of (number, memoryview)
+    @return: see attr_iter_payload()
+    """
+    if isinstance(attr, netlink.Nlattr):
+        return attr_iter_payload(attr.view()[_libmnlh.MNL_ATTR_HDRLEN:])
+    return attr_iter_payload(attr)
+
+
+def _buffer_view(nlh):
+    if isinstance(nlh, netlink.Nlmsghdr) or isinstance(nlh, netlink.Nlattr):
+        return nlh.view()
+    return memoryview(nlh)
+
+
+def _parse_table(v, offset, end, maxtype, tb):
+    if tb is None:
+        tb = [None] * (maxtype + 1)
+    else:
+        # clear in place, no new list for each message
+        del tb[maxtype + 1:]
+        for i in range(len(tb)):
+            tb[i] = None
+        tb.extend([None] * (maxtype + 1 - len(tb)))
+    for nla_type, offset, _nla_len in _attr_walk(v, offset, end):
+        if nla_type <= maxtype:
+            tb[nla_type] = offset
+    return tb
+
+
+def attr_parse_table(nlh, offset, maxtype, tb=None):
+    """index attributes of Netlink message by type without callback
+
+    This is the usual callback, which puts attributes of valid type into
+    an array, done in a pass. tb[type] is the offset of the attribute, struct
+    nlattr, from the beginning of the message or None if it is not found.
+    It is the header, not the payload, so that the length can be read and
+    a nest can be passed to attr_parse_table_nested(), the payload is at
+    tb[type] + MNL_ATTR_HDRLEN. Attributes above maxtype are ignored, the
+    last one wins on duplicates.
+
+    @type nlh: Nlmsghdr or buffer
+    @param nlh: Netlink message
+    @type offset: number
+    @param offset: offset to the attributes from the payload
+    @type maxtype: number
+    @param maxtype: max attribute type, e.g. CTA_MAX
+    @type tb: list
+    @param tb: reused for another message if given
+
+    @rtype: list
+    @return: tb of maxtype + 1 length
+    """
+    v = _buffer_view(nlh)
+    start = _libmnlh.MNL_NLMSG_HDRLEN + _libmnlh.MNL_ALIGN(offset)
+    nlmsg_len = _nlmsghdr_len.unpack_from(v)[0]
+    return _parse_table(v, start, min(nlmsg_len, len(v)), maxtype, tb)
+
+
+def attr_parse_table_nested(nlh, attr_offset, maxtype, tb=None):
+    """index attributes nested in an attribute by type without callback
+
+    @type nlh: Nlmsghdr or buffer
+    @param nlh: Netlink message, or buffer attr_offset is in
+    @type attr_offset: number
+    @param attr_offset: offset of the nest, tb value from attr_parse_table()
+    @type maxtype: number
+    @param maxtype: max attribute type, e.g. CTA_TUPLE_MAX
+    @type tb: list
+    @param tb: reused for another nest if given
+
+    @rtype: list
+    @return: tb of maxtype + 1 length, offsets from the beginning of nlh
+    """
+    v = _buffer_view(nlh)
+    nla_len = _nlattr_struct.unpack_from(v, attr_offset)[0]
+    end = min(attr_offset + nla_len, len(v))
+    return _parse_table(v, attr_offset + _libmnlh.MNL_ATTR_HDRLEN, end, maxtype, tb)
+
+
 # uint8_t mnl_attr_get_u8(const struct nlattr *attr)
 attr_get_u8		= _cproto.c_attr_get_u8
 
@@ -116,7 +253,125 @@ attr_get_u32		= _cproto.c_attr_get_u32
 attr_get_u64		= _cproto.c_attr_get_u64
 
 # const char *mnl_attr_get_str(const struct nlattr *attr)
-attr_get_str		= _cproto.c_attr_get_str
+def attr_get_str(attr, intern=None):
+    """returns string in payload until NUL as bytes
+
+    @type intern: InternTable
+    @param intern: shares the string of the same raw payload
+    """
+    if intern is None:
+        return _cproto.c_attr_get_str(attr)
+    return intern.get(_payload_bytes(attr), _cstr)
+
+def _cstr(b):
+    # as c_char_p
+    i = b.find(b'\0')
+    if i < 0: return b
+    return b[:i]
+
+# not in libmnl, network byte order getters
+_c_be16 = ctypes.c_uint16.__ctype_be__
+_c_be32 = ctypes.c_uint32.__ctype_be__
+_c_be64 = ctypes.c_uint64.__ctype_be__
+
+def attr_get_be16(attr):
+    return _c_be16.from_address(ctypes.addressof(attr) + _libmnlh.MNL_ATTR_HDRLEN).value
+def attr_get_be32(attr):
+    return _c_be32.from_address(ctypes.addressof(attr) + _libmnlh.MNL_ATTR_HDRLEN).value
+def attr_get_be64(attr):
+    return _c_be64.from_address(ctypes.addressof(attr) + _libmnlh.MNL_ATTR_HDRLEN).value
+
+# in network byte order if NLA_F_NET_BYTEORDER is set, or host
+def attr_get_u16_auto(attr):
+    if attr.nla_type & netlink.NLA_F_NET_BYTEORDER:
+        return attr_get_be16(attr)
+    return ctypes.c_uint16.from_address(ctypes.addressof(attr) + _libmnlh.MNL_ATTR_HDRLEN).value
+def attr_get_u32_auto(attr):
+    if attr.nla_type & netlink.NLA_F_NET_BYTEORDER:
+        return attr_get_be32(attr)
+    return ctypes.c_uint32.from_address(ctypes.addressof(attr) + _libmnlh.MNL_ATTR_HDRLEN).value
+def attr_get_u64_auto(attr):
+    if attr.nla_type & netlink.NLA_F_NET_BYTEORDER:
+        return attr_get_be64(attr)
+    return ctypes.c_uint64.from_address(ctypes.addressof(attr) + _libmnlh.MNL_ATTR_HDRLEN).value
+
+
+# not in libmnl, address getters
+def _payload_bytes(attr, size=None):
+    payload_len = attr.nla_len - _libmnlh.MNL_ATTR_HDRLEN
+    if size is None:
+        size = payload_len
+    elif payload_len < size:
+        raise OSError(errno.ERANGE, errno.errorcode[errno.ERANGE])
+    return ctypes.string_at(ctypes.addressof(attr) + _libmnlh.MNL_ATTR_HDRLEN, size)
+
+def _ntop_in(b):
+    return socket.inet_ntop(socket.AF_INET, b)
+
+def _ntop_in6(b):
+    return socket.inet_ntop(socket.AF_INET6, b)
+
+def _ntop_ll(b):
+    return ":".join(["%02x" % i for i in bytearray(b)])
+
+def attr_get_in_addr(attr, intern=None):
+    """returns IPv4 address in payload as dotted string, e.g. "192.0.2.1"
+
+    @type intern: InternTable
+    @param intern: shares the string of the same address
+    """
+    b = _payload_bytes(attr, 4)
+    if intern is None:
+        return _ntop_in(b)
+    return intern.get(b, _ntop_in)
+
+def attr_get_in6_addr(attr, intern=None):
+    """returns IPv6 address in payload as string, e.g. "2001:db8::1"
+
+    @type intern: InternTable
+    @param intern: shares the string of the same address
+    """
+    b = _payload_bytes(attr, 16)
+    if intern is None:
+        return _ntop_in6(b)
+    return intern.get(b, _ntop_in6)
+
+def attr_get_lladdr(attr, intern=None):
+    """returns link layer address, whole payload, e.g. "00:00:5e:00:53:01"
+
+    @type intern: InternTable
+    @param intern: shares the string of the same address
+    """
+    b = _payload_bytes(attr)
+    if intern is None:
+        return _ntop_ll(b)
+    return intern.get(b, _ntop_ll)
+
+
+def _get_many(fmt):
+    unpack_from = struct.Struct(fmt).unpack_from
+    def get_many(buf, offsets):
+        """decode attributes in a call
+
+        @type buf: buffer or Nlmsghdr
+        @param buf: buffer the attributes are in
+        @type offsets: sequence
+        @param offsets: offsets of struct nlattr, e.g. from attr_parse_table()
+
+        @rtype: list
+        @return: values in the order of offsets, None for None offset
+        """
+        v = _buffer_view(buf)
+        hdrlen = _libmnlh.MNL_ATTR_HDRLEN
+        return [None if o is None else unpack_from(v, o + hdrlen)[0] for o in offsets]
+    return get_many
+
+attr_get_u16_many	= _get_many("=H")
+attr_get_u32_many	= _get_many("=I")
+attr_get_u64_many	= _get_many("=Q")
+attr_get_be16_many	= _get_many(">H")
+attr_get_be32_many	= _get_many(">I")
+attr_get_be64_many	= _get_many(">Q")
 
 # void
 # mnl_attr_put(struct nlmsghdr *nlh, uint16_t type, size_t len, const void *data)
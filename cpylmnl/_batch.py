@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import errno, time, select, socket
+
+from .linux import netlinkh as netlink
+from .linux.netfilter import nfnetlinkh as nfnl
+from . import _libmnlh
+from . import _socket
+from . import _nlmsg
+from . import _builder
+from . import _pool
+
+"""
+auto flushing batch sender and nfnetlink batch, not in libmnl
+"""
+
+# errno of Python 2 lacks it
+ECANCELED = getattr(errno, "ECANCELED", 125)
+
+class BatchSender(object):
+    """send requests in batches and collect their acknowledgements
+
+    Requests are built in a buffer of nlmsg_batch_start(), at builder() or
+    current(), and add() allocates the sequence number and sets NLM_F_ACK.
+    When a request does not fit in limit, the batch before it is sent in a
+    datagram and the request moves to the head of the next batch as
+    nlmsg_batch_reset() does. A batch of window requests is sent as well,
+    so that a datagram never holds more than window. Acknowledgements are
+    received after each send, without blocking, and before a send which
+    would exceed window requests in flight, so that they do not overrun
+    the socket receive buffer.
+
+	- sent: the number of sent requests
+	- acked: the number of successful acknowledgements
+	- errors: dict of sequence number to errno of failed requests
+	- unmatched: messages which no request in flight matched
+    """
+    def __init__(self, nl, window=128, limit=_libmnlh.MNL_SOCKET_BUFFER_SIZE,
+                 bufsize=None, pool=None):
+        """create new instance
+
+        @type nl: c_void_p
+        @param nl: bound mnl socket
+        @type window: number
+        @param window: max number of requests in flight, None for no limit
+        @type limit: number
+        @param limit: max size of a batch
+        @type bufsize: number
+        @param bufsize: batch buffer size, limit * 2 if None
+        @type pool: BufferPool
+        @param pool: pool to receive into
+        """
+        self.nl = nl
+        self.window = window
+        self.portid = _socket.socket_get_portid(nl)
+        self.pool = pool or _pool.BufferPool()
+        self.buf = bytearray(bufsize or limit * 2)
+        self.sent = 0
+        self.acked = 0
+        self.errors = {}
+        self.unmatched = 0
+        self._fd = _socket.socket_get_fd(nl)
+        self._b = _nlmsg.nlmsg_batch_start(self.buf, limit)
+        self._seq = int(time.time())
+        self._batch = []	# sequence numbers in the batch
+        self._inflight = set()
+
+
+    def next_seq(self):
+        """allocate a sequence number, never 0
+        """
+        self._seq = (self._seq + 1) & 0xffffffff or 1
+        return self._seq
+
+
+    def inflight(self):
+        """returns the number of requests sent and not acknowledged
+        """
+        return len(self._inflight)
+
+
+    def current(self):
+        """returns the buffer to build the next request in
+
+        @rtype: memoryview
+        """
+        return memoryview(self.buf)[_nlmsg.nlmsg_batch_size(self._b):]
+
+
+    def builder(self):
+        """returns NlmsgBuilder to build the next request
+        """
+        return _builder.NlmsgBuilder(self.buf, _nlmsg.nlmsg_batch_size(self._b))
+
+
+    def add(self):
+        """add the request built at current() to the batch
+
+        The batch is sent if the request does not fit in it.
+
+        @rtype: number
+        @return: sequence number allocated to the request
+        """
+        nlh = netlink.Nlmsghdr.from_buffer(self.buf, _nlmsg.nlmsg_batch_size(self._b))
+        seq = nlh.nlmsg_seq = self.next_seq()
+        nlh.nlmsg_flags |= netlink.NLM_F_ACK
+        if not _nlmsg.nlmsg_batch_next(self._b):
+            self._overflow()
+        self._batch.append(seq)
+        if self.window is not None and len(self._batch) >= self.window:
+            self._send()
+        return seq
+
+
+    def _overflow(self):
+        # send the others, then the request is at the head
+        self._send()
+
+
+    def _send(self):
+        size = _nlmsg.nlmsg_batch_size(self._b)
+        if size > 0:
+            while self._inflight and self.window is not None \
+                  and len(self._inflight) + len(self._batch) > self.window:
+                self.process()
+            _socket.socket_sendto(self.nl, memoryview(self.buf)[:size])
+            self.sent += len(self._batch)
+            self._inflight.update(self._batch)
+            self._batch = []
+        _nlmsg.nlmsg_batch_reset(self._b)
+        while self._inflight and self.process(0):
+            pass
+
+
+    def process(self, timeout=None):
+        """receive a datagram and collect acknowledgements in it
+
+        @type timeout: number
+        @param timeout: seconds to wait for, None blocks
+
+        @rtype: number
+        @return: the number of collected acknowledgements
+        """
+        if timeout is not None:
+            rlist, _wlist, _xlist = select.select([self._fd], [], [], timeout)
+            if not rlist:
+                return 0
+
+        n = 0
+        for nlh in _nlmsg.nlmsg_iter(_socket.socket_recv_auto(self.nl, self.pool)):
+            if nlh.nlmsg_seq not in self._inflight \
+               or not _nlmsg.nlmsg_portid_ok(nlh, self.portid):
+                self.unmatched += 1
+                continue
+            if nlh.nlmsg_type != netlink.NLMSG_ERROR:
+                # data replied to the request
+                continue
+            n += 1
+            self._inflight.remove(nlh.nlmsg_seq)
+            if nlh.nlmsg_len < _nlmsg.nlmsg_size(netlink.Nlmsgerr.csize()):
+                self.errors[nlh.nlmsg_seq] = errno.EBADMSG
+                continue
+            err = _nlmsg.nlmsg_get_payload_as(nlh, netlink.Nlmsgerr)
+            if err.error == 0:
+                self.acked += 1
+            else:
+                self.errors[nlh.nlmsg_seq] = abs(err.error)
+        return n
+
+
+    def flush(self):
+        """send the batch and wait for all acknowledgements
+
+        @rtype: dict
+        @return: errors, sequence number to errno
+        """
+        if not _nlmsg.nlmsg_batch_is_empty(self._b):
+            self._send()
+        while self._inflight:
+            self.process()
+        return self.errors
+
+
+    def close(self):
+        """release the batch, requests not flushed are discarded
+        """
+        if self._b is not None:
+            _nlmsg.nlmsg_batch_stop(self._b)
+            self._b = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, t, v, tb):
+        try:
+            if t is None:
+                self.flush()
+        finally:
+            self.close()
+        return False
+
+
+class NfnlBatch(BatchSender):
+    """nfnetlink messages sent in a transaction
+
+    Messages are put between NFNL_MSG_BATCH_BEGIN and NFNL_MSG_BATCH_END
+    headers of which res_id is the subsystem, and sent in a datagram by
+    flush(), or at the end of with statement, e.g. for nftables:
+
+        with NfnlBatch(nl, NFNL_SUBSYS_NFTABLES) as b:
+            for name in names:
+                b.builder().put_header(...)...
+                b.add()
+        if b.errors: ...
+
+    The subsystem commits the messages only if none of them fails. Since
+    it acknowledges the others than failed ones with 0 even then, they are
+    set to errors with ECANCELED and not counted in acked, so that errors
+    of a transaction is empty or has all of the messages. A message which
+    does not fit in limit raises OSError ENOSPC at add(), and if the
+    subsystem does not support batch, the error of the begin header, e.g.
+    EOPNOTSUPP, is set to all messages.
+
+	- aborts: the number of transactions not committed
+    """
+    _hdrlen = _libmnlh.MNL_NLMSG_HDRLEN + _libmnlh.MNL_ALIGN(nfnl.Nfgenmsg.csize())
+
+    def __init__(self, nl, res_id, limit=_libmnlh.MNL_SOCKET_BUFFER_SIZE, pool=None):
+        """create new instance
+
+        @type nl: c_void_p
+        @param nl: bound NETLINK_NETFILTER mnl socket
+        @type res_id: number
+        @param res_id: subsystem, NFNL_SUBSYS_*
+        @type limit: number
+        @param limit: max size of the datagram
+        @type pool: BufferPool
+        @param pool: pool to receive into
+        """
+        self.res_id = res_id
+        self.limit = limit
+        self.aborts = 0
+        # the end header is put out of the batch
+        super(NfnlBatch, self).__init__(nl, window=None, limit=limit - self._hdrlen, pool=pool)
+        self._begin()
+
+
+    def _put_batch_header(self, nlmsg_type, offset):
+        seq = self.next_seq()
+        b = _builder.NlmsgBuilder(self.buf, offset)
+        b.put_header(nlmsg_type, netlink.NLM_F_REQUEST, seq)
+        nfg = b.put_extra_header_as(nfnl.Nfgenmsg)
+        nfg.nfgen_family = socket.AF_UNSPEC
+        nfg.version = nfnl.NFNETLINK_V0
+        nfg.res_id = socket.htons(self.res_id)
+        return seq
+
+
+    def _begin(self):
+        self._begin_seq = self._put_batch_header(nfnl.NFNL_MSG_BATCH_BEGIN, 0)
+        _nlmsg.nlmsg_batch_next(self._b)
+
+
+    def _overflow(self):
+        raise OSError(errno.ENOSPC, errno.errorcode[errno.ENOSPC])
+
+
+    def flush(self):
+        """send the transaction and wait for all acknowledgements
+
+        Messages added after this are sent in the next transaction.
+
+        @rtype: dict
+        @return: errors, sequence number to errno
+        """
+        if not self._batch:
+            return self.errors
+        size = _nlmsg.nlmsg_batch_size(self._b)
+        self._put_batch_header(nfnl.NFNL_MSG_BATCH_END, size)
+        _socket.socket_sendto(self.nl, memoryview(self.buf)[:size + self._hdrlen])
+        seqs = self._batch
+        self.sent += len(seqs)
+        self._inflight.update(seqs)
+        self._inflight.add(self._begin_seq)
+        self._batch = []
+        # an overflowed batch copies the message at reset, start a new one
+        _nlmsg.nlmsg_batch_stop(self._b)
+        self._b = _nlmsg.nlmsg_batch_start(self.buf, self.limit - self._hdrlen)
+
+        begin_seq = self._begin_seq
+        while self._inflight.difference((begin_seq, )):
+            self.process()
+            err = self.errors.pop(begin_seq, None)
+            if err is not None:
+                for seq in self._inflight:
+                    self.errors[seq] = err
+                self._inflight.clear()
+        self._inflight.discard(begin_seq)
+        self._begin()
+
+        # the transaction has been aborted, nothing is committed
+        errors = self.errors
+        if any(seq in errors for seq in seqs):
+            self.aborts += 1
+            for seq in seqs:
+                if seq not in errors:
+                    errors[seq] = ECANCELED
+                    self.acked -= 1
+        return errors
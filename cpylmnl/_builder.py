@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import errno, struct
+
+from .linux import netlinkh as netlink
+from . import _libmnlh
+
+"""
+message builder writing to buffer directly, not in libmnl
+"""
+
+_nlmsghdr = struct.Struct("=IHHII")
+_nlmsg_len = struct.Struct("=I")
+_nlattr = struct.Struct("=HH")
+_nla_len = struct.Struct("=H")
+_attr_u8 = struct.Struct("=HHB3x")
+_attr_u16 = struct.Struct("=HHH2x")
+_attr_u32 = struct.Struct("=HHI")
+_attr_u64 = struct.Struct("=HHQ")
+
+
+def _no_space():
+    return OSError(errno.ENOSPC, errno.errorcode[errno.ENOSPC])
+
+
+class NlmsgBuilder(object):
+    """build a Netlink message in buffer without libmnl calls
+
+    Each put writes the same bytes as libmnl mnl_nlmsg_put_header(),
+    mnl_nlmsg_put_extra_header(), mnl_attr_put*() and mnl_attr_nest_*() do,
+    by struct.pack_into(), and updates nlmsg_len. Puts check the room in
+    buffer before writing, and raise OSError with ENOSPC if the message
+    would exceed it, leaving the message unchanged. The check is stricter
+    than mnl_attr_put*_check(), which compares the unaligned attribute
+    size and may write its padding past buflen. Here the aligned size,
+    the nlmsg_len growth, has to fit, so that an attribute whose padding
+    does not fit is rejected. Nests and extra header are referred by offset
+    from the beginning of the message. Attribute padding is zeroed, while
+    old libmnl e.g. 1.0.4 leaves it as is.
+    """
+    def __init__(self, buf, offset=0):
+        """create new instance, put_header() is required next
+
+        @type buf: buffer
+        @param buf: writable buffer, bytearray or memoryview
+        @type offset: number
+        @param offset: offset of the message in buf, e.g. in a batch
+        """
+        self.buf = buf
+        self.offset = offset
+        self.buflen = len(buf) - offset
+        self.nlmsg_len = 0
+
+
+    def _grow(self, size):
+        # returns the offset of the tail in buf and grows nlmsg_len
+        if self.nlmsg_len + size > self.buflen:
+            raise _no_space()
+        tail = self.offset + self.nlmsg_len
+        self.nlmsg_len += size
+        _nlmsg_len.pack_into(self.buf, self.offset, self.nlmsg_len)
+        return tail
+
+
+    def put_header(self, nlmsg_type=0, nlmsg_flags=0, nlmsg_seq=0, nlmsg_pid=0):
+        """put Netlink header, see nlmsg_put_header()
+        """
+        if _libmnlh.MNL_NLMSG_HDRLEN > self.buflen:
+            raise _no_space()
+        self.nlmsg_len = _libmnlh.MNL_NLMSG_HDRLEN
+        _nlmsghdr.pack_into(self.buf, self.offset, self.nlmsg_len,
+                            nlmsg_type, nlmsg_flags, nlmsg_seq, nlmsg_pid)
+        return self
+
+
+    def put_extra_header(self, size):
+        """put zeroed extra header, see nlmsg_put_extra_header()
+
+        @rtype: number
+        @return: offset of the extra header from the beginning of message
+        """
+        size = _libmnlh.MNL_ALIGN(size)
+        tail = self._grow(size)
+        self.buf[tail:tail + size] = bytearray(size)
+        return tail - self.offset
+
+
+    def put_extra_header_as(self, cls):
+        """put zeroed extra header and returns cls instance sharing buf
+        """
+        offset = self.put_extra_header(cls.csize())
+        return cls.from_buffer(self.buf, self.offset + offset)
+
+
+    def put(self, attr_type, data):
+        """put attribute of bytes like data, see attr_put()
+        """
+        size = len(data)
+        alen = _libmnlh.MNL_ALIGN(size)
+        tail = self._grow(_libmnlh.MNL_ATTR_HDRLEN + alen)
+        _nlattr.pack_into(self.buf, tail, _libmnlh.MNL_ATTR_HDRLEN + size, attr_type)
+        tail += _libmnlh.MNL_ATTR_HDRLEN
+        self.buf[tail:tail + size] = data
+        if alen > size:
+            self.buf[tail + size:tail + alen] = bytearray(alen - size)
+        return self
+
+
+    def put_u8(self, attr_type, data):
+        _attr_u8.pack_into(self.buf, self._grow(8), 5, attr_type, data)
+        return self
+
+
+    def put_u16(self, attr_type, data):
+        _attr_u16.pack_into(self.buf, self._grow(8), 6, attr_type, data)
+        return self
+
+
+    def put_u32(self, attr_type, data):
+        _attr_u32.pack_into(self.buf, self._grow(8), 8, attr_type, data)
+        return self
+
+
+    def put_u64(self, attr_type, data):
+        _attr_u64.pack_into(self.buf, self._grow(12), 12, attr_type, data)
+        return self
+
+
+    def put_str(self, attr_type, data):
+        """put string without NUL, see attr_put_str()
+        """
+        return self.put(attr_type, data)
+
+
+    def put_strz(self, attr_type, data):
+        """put string with NUL, see attr_put_strz()
+        """
+        return self.put(attr_type, data + b'\0')
+
+
+    def nest_start(self, attr_type):
+        """start a nest, see attr_nest_start()
+
+        @rtype: number
+        @return: offset of the nest to pass to nest_end() or nest_cancel()
+        """
+        tail = self._grow(_libmnlh.MNL_ATTR_HDRLEN)
+        _nlattr.pack_into(self.buf, tail, 0, netlink.NLA_F_NESTED | attr_type)
+        return tail - self.offset
+
+
+    def nest_end(self, start):
+        """end the nest, see attr_nest_end()
+        """
+        _nla_len.pack_into(self.buf, self.offset + start, self.nlmsg_len - start)
+        return self
+
+
+    def nest_cancel(self, start):
+        """cancel the nest and attributes in it, see attr_nest_cancel()
+        """
+        self.nlmsg_len = start
+        _nlmsg_len.pack_into(self.buf, self.offset, start)
+        return self
+
+
+    def nlmsghdr(self):
+        """returns Nlmsghdr sharing buf
+        """
+        return netlink.Nlmsghdr.from_buffer(self.buf, self.offset)
+
+
+    def end(self):
+        """returns the offset where the next message in buf starts
+        """
+        return self.offset + _libmnlh.MNL_ALIGN(self.nlmsg_len)
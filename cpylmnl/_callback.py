@@ -2,10 +2,11 @@
 
 from __future__ import absolute_import, print_function
 
-import sys, os, errno, ctypes
+import sys, os, errno, ctypes, struct
 
 from .linux import netlinkh as netlink
 from . import _cproto
+from . import _libmnlh
 
 
 def cb_run2(buf, seq, portid, cb_data, data, cb_ctls=None):
@@ -25,7 +26,7 @@ def cb_run2(buf, seq, portid, cb_data, data, cb_ctls=None):
     interrupted, errno is set to EINTR and you should request a new fresh dump
     again.
 
-    @type buf: buffer (bytearray)
+    @type buf: buffer (bytearray, memoryview)
     @param buf: buffer that contains the netlink messages
     @type seq: number
     @param seq: sequence number that we expect to receive
@@ -50,10 +51,10 @@ def cb_run2(buf, seq, portid, cb_data, data, cb_ctls=None):
         cb_ctls_len = 0
         c_cb_ctls = None
 
-    c_buf = (ctypes.c_ubyte * len(buf)).from_buffer(buf)
+    c_buf = _cproto.buffer_ref(buf)
     if cb_data is None: cb_data = _cproto.MNL_CB_T()
 
-    ret = _cproto.c_cb_run2(c_buf, len(c_buf), seq, portid, cb_data, data, c_cb_ctls, cb_ctls_len)
+    ret = _cproto.c_cb_run2(c_buf, len(buf), seq, portid, cb_data, data, c_cb_ctls, cb_ctls_len)
     if ret < 0: raise _cproto.os_error()
     return ret
 
@@ -72,7 +73,7 @@ def cb_run(buf, seq, portid, cb_data, data):
     This function propagates the callback return value or raise OSError in case
     of MNL_CB_ERROR.
 
-    @type buf: buffer (bytearray)
+    @type buf: buffer (bytearray, memoryview)
     @param buf: buffer that contains the netlink messages
     @type seq: number
     @param seq: sequence number that we expect to receive
@@ -86,21 +87,133 @@ def cb_run(buf, seq, portid, cb_data, data):
     @rtype: numner
     @return: callback return value - MNL_CB_ERROR, MNL_CB_STOP or MNL_CB_OK
     """
-    c_buf = (ctypes.c_ubyte * len(buf)).from_buffer(buf)
+    c_buf = _cproto.buffer_ref(buf)
     if cb_data is None: cb_data = _cproto.MNL_CB_T()
 
-    ret = _cproto.c_cb_run(c_buf, len(c_buf), seq, portid, cb_data, data)
+    ret = _cproto.c_cb_run(c_buf, len(buf), seq, portid, cb_data, data)
     if ret < 0: raise _cproto.os_error()
     return ret
 
 
+_nlmsghdr_struct = struct.Struct("=IHHII")
+_NLMSG_HDR_SIZE = _nlmsghdr_struct.size
+_NLMSGERR_SIZE = _libmnlh.MNL_NLMSG_HDRLEN + ctypes.sizeof(netlink.Nlmsgerr)
+
+def _py_cb(cb):
+    # Python function of decorated callback, or cb itself if not decorated
+    if cb is None or (isinstance(cb, ctypes._CFuncPtr) and not cb):
+        # NULL is no handler as in libmnl
+        return None
+    f = getattr(cb, "pyfunc", None)
+    if f is not None:
+        return f
+    if isinstance(cb, ctypes._CFuncPtr):
+        return lambda nlh, data: cb(ctypes.byref(nlh), data)
+    return cb
+
+def _py_cb_error(nlh, data):
+    if nlh.nlmsg_len < _NLMSGERR_SIZE:
+        raise OSError(errno.EBADMSG, errno.errorcode[errno.EBADMSG])
+    error = ctypes.c_int.from_address(ctypes.addressof(nlh) + _libmnlh.MNL_NLMSG_HDRLEN).value
+    if error == 0:
+        return _libmnlh.MNL_CB_STOP
+    # Netlink subsystems returns the errno value with different signess
+    en = abs(error)
+    raise OSError(en, errno.errorcode.get(en, "(unknown errno)"))
+
+_py_default_cbs = {
+    netlink.NLMSG_NOOP:		lambda nlh, data: _libmnlh.MNL_CB_OK,
+    netlink.NLMSG_ERROR:	_py_cb_error,
+    netlink.NLMSG_DONE:		lambda nlh, data: _libmnlh.MNL_CB_STOP,
+    netlink.NLMSG_OVERRUN:	lambda nlh, data: _libmnlh.MNL_CB_OK,
+}
+
+def cb_run2_py(buf, seq, portid, cb_data, data, cb_ctls=None):
+    """callback runqueue for netlink messages, walking buf in Python
+
+    Same as cb_run2() including return value, raising OSError and control
+    message handling, but messages are walked by struct.unpack_from() and
+    callbacks are called from Python directly, without C to Python
+    transition by libmnl. Callbacks decorated by mnl_cb_t, or plain Python
+    functions receiving (Nlmsghdr, data) can be used.
+
+    @type buf: buffer (bytearray, memoryview)
+    @param buf: buffer that contains the netlink messages
+    @type seq: number
+    @param seq: sequence number that we expect to receive
+    @type portid: number
+    @param portid: Netlink PortID that we expect to receive
+    @type cb_data: mnl_cb_t decorated or Python function
+    @param cb_data: callback handler for data messages
+    @type data: any
+    @param data: data that will be passed to the data callback handler
+    @type cb_ctls: map
+    @param cb_ctls: dict of custom callback handlers from control messages
+
+    @rtype: numner
+    @return: callback return value - MNL_CB_ERROR, MNL_CB_STOP or MNL_CB_OK
+    """
+    if memoryview(buf).readonly:
+        buf = bytearray(buf)
+    cb_data = _py_cb(cb_data)
+    if cb_ctls is not None:
+        ctls = dict((k, _py_cb(v)) for k, v in cb_ctls.items())
+    else:
+        ctls = _py_default_cbs
+
+    unpack_from = _nlmsghdr_struct.unpack_from
+    ret = _libmnlh.MNL_CB_OK
+    offset = 0
+    remains = len(buf)
+    while remains >= _NLMSG_HDR_SIZE:
+        nlmsg_len, nlmsg_type, nlmsg_flags, nlmsg_seq, nlmsg_pid = unpack_from(buf, offset)
+        if nlmsg_len < _NLMSG_HDR_SIZE or nlmsg_len > remains:
+            break
+        # check message source
+        if nlmsg_pid and portid and nlmsg_pid != portid:
+            raise OSError(errno.ESRCH, errno.errorcode[errno.ESRCH])
+        # perform sequence tracking
+        if nlmsg_seq and seq and nlmsg_seq != seq:
+            raise OSError(errno.EPROTO, errno.errorcode[errno.EPROTO])
+        # dump was interrupted
+        if nlmsg_flags & netlink.NLM_F_DUMP_INTR:
+            raise OSError(errno.EINTR, errno.errorcode[errno.EINTR])
+
+        if nlmsg_type >= netlink.NLMSG_MIN_TYPE:
+            cb = cb_data
+        else:
+            cb = ctls.get(nlmsg_type)
+        if cb is not None:
+            ret = cb(netlink.Nlmsghdr.from_buffer(buf, offset), data)
+            if ret < _libmnlh.MNL_CB_STOP: raise _cproto.os_error()
+            if ret == _libmnlh.MNL_CB_STOP: break
+
+        nlmsg_len = _libmnlh.MNL_ALIGN(nlmsg_len)
+        offset += nlmsg_len
+        remains -= nlmsg_len
+
+    return ret
+
+
+def cb_run_py(buf, seq, portid, cb_data, data):
+    """callback runqueue for netlink messages, walking buf in Python
+    (simplified version)
+
+    Same as cb_run(), see cb_run2_py().
+    """
+    return cb_run2_py(buf, seq, portid, cb_data, data)
+
+
 def _cb_factory(argcls, cftype):
     def _decorator(cbfunc):
         def _inner(ptr, data):
             o = ctypes.cast(ptr, ctypes.POINTER(argcls)).contents
             ret = cbfunc(o, data)
             return ret
-        return cftype(_inner)
+        f = cftype(_inner)
+        # for the Python runqueue, cb_run_py()
+        f.pyfunc = cbfunc
+        return f
     return _decorator
 
 mnl_cb_t	= _cb_factory(netlink.Nlmsghdr, _cproto.MNL_CB_T)
@@ -2,9 +2,10 @@
 
 from __future__ import absolute_import
 
-import errno, ctypes
+import sys, errno, ctypes
 
 from .linux import netlinkh as netlink
+from . import nlstruct
 
 LIBMNL = ctypes.CDLL("libmnl.so", use_errno=True)
 
@@ -504,6 +505,98 @@ c_cb_run2.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_
 c_cb_run2.restype = ctypes.c_int
 
 
+##
+# libc socket API, which libmnl does not wrap
+##
+LIBC = ctypes.CDLL("libc.so.6", use_errno=True)
+
+class Iovec(ctypes.Structure):
+    """struct iovec
+    """
+    _fields_ = [("iov_base",	ctypes.c_void_p), # void *iov_base	/* Pointer to data.  */
+                ("iov_len",	ctypes.c_size_t)] # size_t iov_len	/* Length of data.  */
+
+class Msghdr(ctypes.Structure):
+    """struct msghdr
+    """
+    _fields_ = [("msg_name",		ctypes.c_void_p),	# void *msg_name		/* Address to send to/receive from.  */
+                ("msg_namelen",		c_socklen_t),		# socklen_t msg_namelen	/* Length of address data.  */
+                ("msg_iov",		ctypes.POINTER(Iovec)),	# struct iovec *msg_iov	/* Vector of data to send/receive into.  */
+                ("msg_iovlen",		ctypes.c_size_t),	# size_t msg_iovlen		/* Number of elements in the vector.  */
+                ("msg_control",		ctypes.c_void_p),	# void *msg_control		/* Ancillary data (eg BSD filedesc passing). */
+                ("msg_controllen",	ctypes.c_size_t),	# size_t msg_controllen	/* Ancillary data buffer length.  */
+                ("msg_flags",		ctypes.c_int)]		# int msg_flags		/* Flags on received message.  */
+
+class Mmsghdr(ctypes.Structure):
+    """struct mmsghdr
+    """
+    _fields_ = [("msg_hdr",	Msghdr),	 # struct msghdr msg_hdr	/* Actual message header.  */
+                ("msg_len",	ctypes.c_uint)] # unsigned int msg_len	/* Number of received or sent bytes for the entry.  */
+
+MSG_PEEK		= 0x02
+MSG_TRUNC		= 0x20
+MSG_WAITFORONE		= 0x10000
+
+SOL_SOCKET		= 1
+SO_RCVBUF		= 8
+SO_RCVBUFFORCE		= 33
+
+c_setsockopt = LIBC.setsockopt
+c_setsockopt.__doc__ = """\
+int setsockopt(int sockfd, int level, int optname, const void *optval, socklen_t optlen)"""
+c_setsockopt.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_void_p, c_socklen_t]
+c_setsockopt.restype = ctypes.c_int
+
+c_recv = LIBC.recv
+c_recv.__doc__ = """\
+ssize_t recv(int sockfd, void *buf, size_t len, int flags)"""
+c_recv.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+c_recv.restype = c_ssize_t
+
+c_recvmmsg = LIBC.recvmmsg
+c_recvmmsg.__doc__ = """\
+int recvmmsg(int sockfd, struct mmsghdr *msgvec, unsigned int vlen,
+             int flags, struct timespec *timeout)"""
+c_recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(Mmsghdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+c_recvmmsg.restype = ctypes.c_int
+
+c_sendmsg = LIBC.sendmsg
+c_sendmsg.__doc__ = """\
+ssize_t sendmsg(int sockfd, const struct msghdr *msg, int flags)"""
+c_sendmsg.argtypes = [ctypes.c_int, ctypes.POINTER(Msghdr), ctypes.c_int]
+c_sendmsg.restype = c_ssize_t
+
+c_sendmmsg = LIBC.sendmmsg
+c_sendmmsg.__doc__ = """\
+int sendmmsg(int sockfd, struct mmsghdr *msgvec, unsigned int vlen, int flags)"""
+c_sendmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(Mmsghdr), ctypes.c_uint, ctypes.c_int]
+c_sendmmsg.restype = ctypes.c_int
+
+
+def buffer_ref(buf):
+    """returns reference to the head of buf, which can be passed as void *
+
+    No ctypes array type sized len(buf) is created, so that any buffer
+    including memoryview slice can be passed cheaply. Read only buffer like
+    bytes is copied. None is returned for empty buffer."""
+    if len(buf) == 0:
+        return None
+    try:
+        return ctypes.byref(ctypes.c_char.from_buffer(buf))
+    except TypeError: # read only, or memoryview on Python 2
+        if sys.version_info[0] < 3 and isinstance(buf, memoryview) and not buf.readonly:
+            return ctypes.byref(nlstruct.ubyte_array_of(buf))
+        return ctypes.byref(ctypes.create_string_buffer(buffer_bytes(buf), len(buf)))
+
+
+def buffer_bytes(buf):
+    """returns the contents of buf as bytes, which bytes() of memoryview
+    does not on Python 2"""
+    if isinstance(buf, memoryview):
+        return buf.tobytes()
+    return bytes(buf)
+
+
 def os_error():
     """create OSError from C errno. And clear C errno"""
     en = ctypes.get_errno()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import errno, time
+
+from .linux import netlinkh as netlink
+from . import _socket
+from . import _nlmsg
+from . import _pool
+
+"""
+streaming dump iterator, not in libmnl
+"""
+
+class Dump(object):
+    """iterate over the replies of a dump request lazily
+
+    Sends nlh and yields the data messages, Nlmsghdr, across datagrams until
+    NLMSG_DONE. Each datagram is received into a BufferPool lease, which
+    returns to the pool when the messages in it are dropped, so that memory
+    usage does not depend on the dump size.
+
+    If NLM_F_DUMP_INTR is found, the dump was inconsistent and the rest of
+    it is skipped until its NLMSG_DONE. Then OSError with EINTR is raised,
+    unless restart is True, where on_restart() is called to discard the
+    messages already yielded and the request is sent again with a new
+    sequence number up to max_restarts times.
+
+	- restarts: the number of restarts
+    """
+    def __init__(self, nl, nlh, restart=False, max_restarts=3, on_restart=None, pool=None):
+        """create new instance and send the request
+
+        @type nl: c_void_p
+        @param nl: bound mnl socket
+        @type nlh: Nlmsghdr
+        @param nlh: dump request, NLM_F_DUMP is set
+        @type restart: bool
+        @param restart: restart the interrupted dump
+        @type max_restarts: number
+        @param max_restarts: raise EINTR after restarting this times
+        @type on_restart: callable
+        @param on_restart: called without argument before restarting
+        @type pool: BufferPool
+        @param pool: pool to receive into
+        """
+        self.nl = nl
+        self.nlh = nlh
+        self.restart = restart
+        self.max_restarts = max_restarts
+        self.on_restart = on_restart
+        self.pool = pool or _pool.BufferPool()
+        self.restarts = 0
+        self._portid = _socket.socket_get_portid(nl)
+        nlh.nlmsg_flags |= netlink.NLM_F_DUMP
+        if nlh.nlmsg_seq == 0:
+            nlh.nlmsg_seq = int(time.time())
+        self._send()
+
+
+    def _send(self):
+        _socket.socket_send_nlmsg(self.nl, self.nlh)
+
+
+    def __iter__(self):
+        interrupted = False
+        while True:
+            buf = _socket.socket_recv_auto(self.nl, self.pool)
+            for nlh in _nlmsg.nlmsg_iter(buf):
+                if not _nlmsg.nlmsg_portid_ok(nlh, self._portid):
+                    raise OSError(errno.ESRCH, errno.errorcode[errno.ESRCH])
+                if nlh.nlmsg_seq != self.nlh.nlmsg_seq:
+                    continue
+                if nlh.nlmsg_flags & netlink.NLM_F_DUMP_INTR:
+                    # kernel continues the dump, drain it before restarting
+                    # or raising
+                    interrupted = True
+                if nlh.nlmsg_type == netlink.NLMSG_DONE:
+                    if not interrupted:
+                        return
+                    if not self.restart or self.restarts >= self.max_restarts:
+                        raise OSError(errno.EINTR, errno.errorcode[errno.EINTR])
+                    self._restart()
+                    interrupted = False
+                    break
+                if nlh.nlmsg_type == netlink.NLMSG_ERROR:
+                    err = _nlmsg.nlmsg_get_payload_as(nlh, netlink.Nlmsgerr)
+                    en = abs(err.error) or interrupted and errno.EINTR
+                    if not en:
+                        return
+                    raise OSError(en, errno.errorcode[en])
+                if not interrupted and nlh.nlmsg_type >= netlink.NLMSG_MIN_TYPE:
+                    yield nlh
+
+
+    def _restart(self):
+        self.restarts += 1
+        if self.on_restart is not None:
+            self.on_restart()
+        self.nlh.nlmsg_seq = (self.nlh.nlmsg_seq + 1) & 0xffffffff or 1
+        self._send()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import collections
+
+"""
+bounded intern table for decoded attribute values, not in libmnl
+"""
+
+class InternTable(object):
+    """share decoded objects of the same raw bytes
+
+    Decoded values are kept by the raw payload bytes, so that the same
+    address or name received in many messages is decoded once and shares
+    an object. When maxsize values are kept, the least recently used one
+    is evicted, so that hot values stay while one-off ones go. Since
+    the key is raw bytes only, a table should be used for a kind of value,
+    e.g. one for IPv4 addresses and another for link layer addresses.
+
+	- hits: values found in the table
+	- misses: values decoded
+	- evictions: values dropped over maxsize
+    """
+    def __init__(self, maxsize=4096):
+        """create new instance
+
+        @type maxsize: number
+        @param maxsize: max number of values, 0 or less disables the table
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._values = collections.OrderedDict() # raw bytes: value
+
+
+    def get(self, key, decode):
+        """returns the value of key, decode(key) if it is not in the table
+
+        @type key: bytes
+        @param key: raw payload
+        @type decode: callable
+        @param decode: called with key on a miss
+
+        @return: interned value
+        """
+        try:
+            v = self._values.pop(key)
+        except KeyError:
+            pass
+        else:
+            # most recently used at the end
+            self._values[key] = v
+            self.hits += 1
+            return v
+        self.misses += 1
+        v = decode(key)
+        if self.maxsize <= 0:
+            return v
+        if len(self._values) >= self.maxsize:
+            self._values.popitem(last=False)
+            self.evictions += 1
+        self._values[key] = v
+        return v
+
+
+    def hit_rate(self):
+        """returns hits / lookups, 0.0 if no lookup
+        """
+        n = self.hits + self.misses
+        return n and float(self.hits) / n or 0.0
+
+
+    def __len__(self):
+        return len(self._values)
+
+
+    def __contains__(self, key):
+        return key in self._values
+
+
+    def clear(self):
+        """drop values, counters are not reset
+        """
+        self._values.clear()
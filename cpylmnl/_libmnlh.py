@@ -2,6 +2,7 @@
 
 import os, ctypes
 from . import _cproto
+from . import nlstruct
 from .linux import netlinkh as netlink
 
 
@@ -70,10 +71,9 @@ if _cproto.HAS_MNL_RING:
         is struct nl_mmap_hdr.nm_len. You will need to specify size because
         it will be 0 in case of TX"""
         if size is None:
-            return ctypes.cast(ctypes.addressof(frame) + netlink.NL_MMAP_HDRLEN,
-                               ctypes.POINTER(ctypes.c_ubyte * frame.nm_len)).contents
-        return ctypes.cast(ctypes.addressof(frame) + netlink.NL_MMAP_HDRLEN,
-                           ctypes.POINTER(ctypes.c_ubyte * size)).contents
+            return nlstruct.ubyte_array_at(ctypes.addressof(frame) + netlink.NL_MMAP_HDRLEN,
+                                           frame.nm_len)
+        return nlstruct.ubyte_array_at(ctypes.addressof(frame) + netlink.NL_MMAP_HDRLEN, size)
 
     MNL_RING_RX = 0
     MNL_RING_TX = 1
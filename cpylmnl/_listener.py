@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import errno, struct, select, threading, collections
+
+from .linux import netlinkh as netlink
+from . import _libmnlh
+from . import _socket
+from . import _callback
+from . import _pool
+
+"""
+multicast listener recovering from overrun, not in libmnl
+"""
+
+class Listener(object):
+    """receive multicast events and resynchronise on ENOBUFS
+
+    When the listener falls behind, the kernel drops events and the next
+    receive raises OSError with ENOBUFS. Listener counts it and calls
+    resync(), which is expected to rebuild the state by a fresh dump, on
+    another socket. Events queued in this socket before resync() are
+    superseded by the dump and dropped. resync() runs in a thread while
+    this one keeps receiving new events into a userspace queue, so that
+    the socket buffer does not overflow again, and they are passed to the
+    callback after resync() returns. Since the dump may already reflect
+    some of them, the callback should apply an event idempotently. An
+    overrun during resync() calls it again.
+
+    no_enobufs sets NETLINK_NO_ENOBUFS, then the kernel does not report
+    overruns and resync() is never called.
+
+	- overruns: the number of ENOBUFS
+	- resyncs: the number of resync() calls
+	- dropped: the number of datagrams dropped before resync()
+	- buffered: the number of datagrams queued during resync()
+    """
+    # seconds to wait for events at once while resync() runs
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, nl, cb_data, data=None, resync=None, rcvbuf=None,
+                 no_enobufs=False, cb_ctls=None, pool=None):
+        """create new instance
+
+        @type nl: c_void_p
+        @param nl: mnl socket bound to multicast groups
+        @type cb_data: mnl_cb_t
+        @param cb_data: passed to cb_run2() with data and cb_ctls
+        @type resync: callable
+        @param resync: called without argument on overrun, in a thread
+        @type rcvbuf: number
+        @param rcvbuf: receive buffer size set by SO_RCVBUFFORCE
+        @type no_enobufs: bool
+        @param no_enobufs: set NETLINK_NO_ENOBUFS
+        @type pool: BufferPool
+        @param pool: pool to receive into
+        """
+        self.nl = nl
+        self.cb_data = cb_data
+        self.data = data
+        self.cb_ctls = cb_ctls
+        self.resync = resync
+        self.pool = pool or _pool.BufferPool()
+        self.overruns = 0
+        self.resyncs = 0
+        self.dropped = 0
+        self.buffered = 0
+        self._fd = _socket.socket_get_fd(nl)
+        self._backlog = collections.deque() # datagrams received during resync()
+        if rcvbuf is not None:
+            _socket.socket_set_rcvbuf(nl, rcvbuf)
+        if no_enobufs:
+            _socket.socket_setsockopt(nl, netlink.NETLINK_NO_ENOBUFS, struct.pack("i", 1))
+
+
+    def _drain(self, timeout, keep):
+        # receives queued datagrams, returns True on overrun
+        overrun = False
+        while select.select([self._fd], [], [], timeout)[0]:
+            timeout = 0
+            try:
+                buf = _socket.socket_recv_auto(self.nl, self.pool)
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                self.overruns += 1
+                overrun = True
+                continue
+            if keep:
+                self._backlog.append(buf)
+                self.buffered += 1
+            else:
+                self.dropped += 1
+        return overrun
+
+
+    def _resync(self):
+        errors = []
+        def run():
+            try:
+                self.resync()
+            except Exception as e:
+                errors.append(e)
+
+        t = threading.Thread(target=run)
+        t.start()
+        overrun = False
+        try:
+            while t.is_alive():
+                overrun = self._drain(self.POLL_INTERVAL, True) or overrun
+        finally:
+            t.join()
+        if errors:
+            raise errors[0]
+        return overrun
+
+
+    def overrun(self):
+        """count an overrun and call resync()
+
+        Events received while resync() runs are queued for process().
+        """
+        self.overruns += 1
+        if self.resync is None:
+            return
+        again = True
+        while again:
+            self._backlog.clear()
+            # superseded by the dump of resync()
+            self._drain(0, False)
+            self.resyncs += 1
+            again = self._resync()
+
+
+    def process(self):
+        """receive a datagram and pass it to cb_run2()
+
+        Datagrams queued during resync() are passed first.
+
+        @rtype: number
+        @return: callback return value, MNL_CB_OK on overrun
+        """
+        if self._backlog:
+            buf = self._backlog.popleft()
+        else:
+            try:
+                buf = _socket.socket_recv_auto(self.nl, self.pool)
+            except OSError as e:
+                if e.errno != errno.ENOBUFS:
+                    raise
+                self.overrun()
+                return _libmnlh.MNL_CB_OK
+        return _callback.cb_run2(buf, 0, 0, self.cb_data, self.data, self.cb_ctls)
+
+
+    def run(self):
+        """process until a callback returns MNL_CB_STOP
+        """
+        while self.process() > _libmnlh.MNL_CB_STOP:
+            pass
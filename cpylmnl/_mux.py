@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import os, errno, fcntl, select
+
+from . import _socket
+from . import _callback
+from . import _pool
+
+"""
+epoll multiplexer for many netlink sockets, not in libmnl
+"""
+
+class SocketStats(object):
+    """per socket statistics of SocketMux
+
+	- wakeups: times epoll reported the socket ready
+	- datagrams: received datagrams
+	- bytes: received bytes
+	- max_drain: max datagrams received in a wakeup
+	- errors: OSError raised by receive or callback runqueue
+	- last_error: the last OSError
+    """
+    __slots__ = ("wakeups", "datagrams", "bytes", "max_drain", "errors", "last_error")
+
+    def __init__(self):
+        self.wakeups = 0
+        self.datagrams = 0
+        self.bytes = 0
+        self.max_drain = 0
+        self.errors = 0
+        self.last_error = None
+
+
+class _Entry(object):
+    __slots__ = ("nl", "cb_data", "data", "seq", "portid", "cb_ctls", "errback", "pool", "stats")
+
+
+class SocketMux(object):
+    """dispatch netlink messages of many sockets in a thread by epoll
+
+    Each registered socket is set to non-blocking. When epoll reports it
+    readable, it is drained until EAGAIN, passing each datagram to
+    cb_run2() with its own callbacks.
+    """
+    def __init__(self):
+        self._epoll = select.epoll()
+        self._entries = {} # fd: _Entry
+
+
+    def register(self, nl, cb_data, data=None, seq=0, portid=0, cb_ctls=None,
+                 errback=None, pool=None):
+        """register a socket
+
+        seq, portid, cb_data, data and cb_ctls are passed to cb_run2(). If
+        errback is given, OSError in receiving or callback runqueue is passed
+        to it as errback(nl, exception), or raised from poll().
+
+        @type nl: c_void_p
+        @param nl: bound mnl socket
+        @type pool: BufferPool
+        @param pool: pool to receive into, created per socket if None
+        """
+        fd = _socket.socket_get_fd(nl)
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+        e = _Entry()
+        e.nl = nl
+        e.cb_data = cb_data
+        e.data = data
+        e.seq = seq
+        e.portid = portid
+        e.cb_ctls = cb_ctls
+        e.errback = errback
+        e.pool = pool or _pool.BufferPool(count=4)
+        e.stats = SocketStats()
+        self._epoll.register(fd, select.EPOLLIN)
+        self._entries[fd] = e
+
+
+    def unregister(self, nl):
+        """unregister a socket, which is not closed
+        """
+        fd = _socket.socket_get_fd(nl)
+        self._epoll.unregister(fd)
+        del self._entries[fd]
+
+
+    def stats(self, nl):
+        """returns SocketStats of a socket
+        """
+        return self._entries[_socket.socket_get_fd(nl)].stats
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def _drain(self, e):
+        n = 0
+        try:
+            while True:
+                try:
+                    buf = _socket.socket_recv_auto(e.nl, e.pool)
+                except OSError as exc:
+                    if exc.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                        break
+                    raise
+                n += 1
+                e.stats.bytes += len(buf)
+                _callback.cb_run2(buf, e.seq, e.portid, e.cb_data, e.data, e.cb_ctls)
+        except OSError as exc:
+            e.stats.errors += 1
+            e.stats.last_error = exc
+            if e.errback is None:
+                raise
+            e.errback(e.nl, exc)
+        finally:
+            e.stats.datagrams += n
+            if n > e.stats.max_drain:
+                e.stats.max_drain = n
+        return n
+
+
+    def poll(self, timeout=-1):
+        """wait for readable sockets and dispatch their messages
+
+        @type timeout: number
+        @param timeout: in seconds, -1 blocks
+
+        @rtype: number
+        @return: the number of dispatched datagrams
+        """
+        n = 0
+        for fd, _events in self._epoll.poll(timeout):
+            e = self._entries.get(fd)
+            if e is None: continue
+            e.stats.wakeups += 1
+            n += self._drain(e)
+        return n
+
+
+    def close(self):
+        """close epoll, registered sockets are not closed
+        """
+        self._epoll.close()
+        self._entries.clear()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, t, v, tb):
+        self.close()
+        return False
@@ -5,6 +5,7 @@ from __future__ import absolute_import, print_function
 import sys, os, errno, ctypes
 
 from .linux import netlinkh as netlink
+from . import nlstruct
 from . import _cproto
 from . import _libmnlh
 
@@ -36,7 +37,7 @@ def nlmsg_put_header(buf, cls=None):
     @rtype: Nlmsghdr or its subclass
     @return: Netlink header object
     """
-    c_buf = (ctypes.c_ubyte * len(buf)).from_buffer(buf)
+    c_buf = nlstruct.ubyte_array_of(buf)
     ret = _cproto.c_nlmsg_put_header(c_buf)
     if cls is None:
         return ret.contents
@@ -49,29 +50,29 @@ def nlmsg_put_header(buf, cls=None):
 # mnl_nlmsg_put_extra_header(struct nlmsghdr *nlh, size_t size)
 nlmsg_put_extra_header	= _cproto.c_nlmsg_put_extra_header
 def nlmsg_put_extra_header_v(nlh, size):
-    return ctypes.cast(_cproto.c_nlmsg_put_extra_header(nlh, size),
-                ctypes.POINTER(ctypes.c_ubyte * _libmnlh.MNL_ALIGN(size))).contents
+    return nlstruct.ubyte_array_at(_cproto.c_nlmsg_put_extra_header(nlh, size),
+                                   _libmnlh.MNL_ALIGN(size))
 def nlmsg_put_extra_header_as(nlh, cls, size=None):
     if size is None:
         size = ctypes.sizeof(cls)
-    return ctypes.cast(_cproto.c_nlmsg_put_extra_header(nlh, size), ctypes.POINTER(cls)).contents
+    return cls.from_address(_cproto.c_nlmsg_put_extra_header(nlh, size))
 
 # void *mnl_nlmsg_get_payload(const struct nlmsghdr *nlh)
 nlmsg_get_payload	= _cproto.c_nlmsg_get_payload
 def nlmsg_get_payload_v(nlh):
-    return ctypes.cast(_cproto.c_nlmsg_get_payload(nlh),
-                ctypes.POINTER(ctypes.c_ubyte * _cproto.c_nlmsg_get_payload_len(nlh))).contents
+    return nlstruct.ubyte_array_at(_cproto.c_nlmsg_get_payload(nlh),
+                                   _cproto.c_nlmsg_get_payload_len(nlh))
 def nlmsg_get_payload_as(nlh, cls):
-    return ctypes.cast(_cproto.c_nlmsg_get_payload(nlh), ctypes.POINTER(cls)).contents
+    return cls.from_address(_cproto.c_nlmsg_get_payload(nlh))
 
 # void *
 # mnl_nlmsg_get_payload_offset(const struct nlmsghdr *nlh, size_t offset)
 nlmsg_get_payload_offset= _cproto.c_nlmsg_get_payload_offset
 def nlmsg_get_payload_offset_v(nlh, offset):
-    return ctypes.cast(_cproto.c_nlmsg_get_payload_offset(nlh, offset),
-                ctypes.POINTER(ctypes.c_ubyte * (_cproto.c_nlmsg_get_payload_len(nlh) - _libmnlh.MNL_ALIGN(offset)))).contents
+    return nlstruct.ubyte_array_at(_cproto.c_nlmsg_get_payload_offset(nlh, offset),
+                                   _cproto.c_nlmsg_get_payload_len(nlh) - _libmnlh.MNL_ALIGN(offset))
 def nlmsg_get_payload_offset_as(nlh, offset, cls):
-    return ctypes.cast(_cproto.c_nlmsg_get_payload_offset(nlh, offset), ctypes.POINTER(cls)).contents
+    return cls.from_address(_cproto.c_nlmsg_get_payload_offset(nlh, offset))
 
 # bool mnl_nlmsg_ok(const struct nlmsghdr *nlh, int len)
 nlmsg_ok		= _cproto.c_nlmsg_ok
@@ -82,6 +83,30 @@ def nlmsg_next(nlh, size):
     csize = ctypes.c_int(size)
     return _cproto.c_nlmsg_next(nlh, ctypes.byref(csize)).contents, csize.value
 
+def nlmsg_iter(buf):
+    """iterate over Netlink messages in buf
+
+    Walks buf in the same way as the loop of mnl_nlmsg_ok() and
+    mnl_nlmsg_next(), without calling them.
+
+    @type buf: buffer (bytearray, memoryview)
+    @param buf: mutable buffer that contains the netlink messages
+
+    @rtype: generator of Nlmsghdr
+    @return: Netlink header objects sharing buf
+    """
+    offset = 0
+    remains = len(buf)
+    hdrlen = ctypes.sizeof(netlink.Nlmsghdr)
+    while remains >= hdrlen:
+        nlh = netlink.Nlmsghdr.from_buffer(buf, offset)
+        if nlh.nlmsg_len < hdrlen or nlh.nlmsg_len > remains:
+            return
+        yield nlh
+        size = _libmnlh.MNL_ALIGN(nlh.nlmsg_len)
+        offset += size
+        remains -= size
+
 # void *mnl_nlmsg_get_payload_tail(const struct nlmsghdr *nlh)
 nlmsg_get_payload_tail	= _cproto.c_nlmsg_get_payload_tail
 
@@ -98,13 +123,13 @@ nlmsg_portid_ok		= _cproto.c_nlmsg_portid_ok
 #                   size_t extra_header_size)
 def nlmsg_fprint(buf, extra_header_size, out=None):
     if out is None: out = sys.__stdout__
-    c_buf = (ctypes.c_ubyte * len(buf)).from_buffer(buf)
+    c_buf = nlstruct.ubyte_array_of(buf)
     f = _cproto.c_fdopen(out.fileno(), out.mode)
     _cproto.c_nlmsg_fprintf(f, c_buf, len(buf), extra_header_size)
 
 # struct mnl_nlmsg_batch *mnl_nlmsg_batch_start(void *buf, size_t limit)
 def nlmsg_batch_start(buf, limit):
-    c_buf = (ctypes.c_ubyte * len(buf)).from_buffer(buf)
+    c_buf = nlstruct.ubyte_array_of(buf)
     return _cproto.c_nlmsg_batch_start(c_buf, limit)
 
 # void mnl_nlmsg_batch_stop(struct mnl_nlmsg_batch *b)
@@ -122,7 +147,7 @@ nlmsg_batch_size	= _cproto.c_nlmsg_batch_size
 # void *mnl_nlmsg_batch_head(struct mnl_nlmsg_batch *b)
 nlmsg_batch_head	= _cproto.c_nlmsg_batch_head
 def nlmsg_batch_head_v(b):
-    return ctypes.cast(_cproto.c_nlmsg_batch_head(b), ctypes.POINTER(ctypes.c_ubyte * nlmsg_batch_size(b))).contents
+    return nlstruct.ubyte_array_at(_cproto.c_nlmsg_batch_head(b), nlmsg_batch_size(b))
 
 # void *mnl_nlmsg_batch_current(struct mnl_nlmsg_batch *b)
 # XXX: inoperable in python, can not determine the size of current from the APIs
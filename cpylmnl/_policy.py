@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import errno, struct
+
+from .linux import netlinkh as netlink
+from . import _libmnlh
+from . import _attr
+
+"""
+declarative attribute policy and validating decoder, not in libmnl
+"""
+
+# static const size_t mnl_attr_data_type_len[MNL_TYPE_MAX]
+_data_type_len = {
+    _libmnlh.MNL_TYPE_U8:	1,
+    _libmnlh.MNL_TYPE_U16:	2,
+    _libmnlh.MNL_TYPE_U32:	4,
+    _libmnlh.MNL_TYPE_U64:	8,
+    _libmnlh.MNL_TYPE_MSECS:	8,
+}
+
+_int_structs = {
+    _libmnlh.MNL_TYPE_U8:	struct.Struct("=B"),
+    _libmnlh.MNL_TYPE_U16:	struct.Struct("=H"),
+    _libmnlh.MNL_TYPE_U32:	struct.Struct("=I"),
+    _libmnlh.MNL_TYPE_U64:	struct.Struct("=Q"),
+    _libmnlh.MNL_TYPE_MSECS:	struct.Struct("=Q"),
+}
+
+
+def _range_error():
+    return OSError(errno.ERANGE, errno.errorcode[errno.ERANGE])
+
+
+def _validate(v, data_type, exp_len):
+    # same as __mnl_attr_validate()
+    attr_len = len(v)
+    if attr_len < exp_len:
+        raise _range_error()
+    if data_type == _libmnlh.MNL_TYPE_FLAG:
+        if attr_len > 0: raise _range_error()
+    elif data_type == _libmnlh.MNL_TYPE_NUL_STRING:
+        if attr_len == 0: raise _range_error()
+        if v[attr_len - 1] not in (0, b'\0'):
+            raise OSError(errno.EINVAL, errno.errorcode[errno.EINVAL])
+    elif data_type == _libmnlh.MNL_TYPE_STRING:
+        if attr_len == 0: raise _range_error()
+    elif data_type == _libmnlh.MNL_TYPE_NESTED:
+        if attr_len != 0 and attr_len < _libmnlh.MNL_ATTR_HDRLEN:
+            raise _range_error()
+    if exp_len and attr_len > exp_len:
+        raise _range_error()
+
+
+def _decode_str(v):
+    # as mnl_attr_get_str(), c_char_p stops at NUL
+    return _attr._cstr(v.tobytes())
+
+
+def _decoder(data_type, exp_len, intern=None):
+    s = _int_structs.get(data_type)
+    if s is not None:
+        unpack_from = s.unpack_from
+        if exp_len >= s.size:
+            return lambda v: unpack_from(v)[0]
+        # validated by shorter length than the integer
+        def decode_int(v):
+            if len(v) < s.size: raise _range_error()
+            return unpack_from(v)[0]
+        return decode_int
+    if data_type in (_libmnlh.MNL_TYPE_STRING, _libmnlh.MNL_TYPE_NUL_STRING):
+        if intern is not None:
+            get, cstr = intern.get, _attr._cstr
+            return lambda v: get(v.tobytes(), cstr)
+        return _decode_str
+    if data_type == _libmnlh.MNL_TYPE_FLAG:
+        return lambda v: True
+    # UNSPEC, NESTED without policy, NESTED_COMPAT and BINARY
+    return lambda v: v.tobytes()
+
+
+class NestedArray(object):
+    """policy value for a nest of nests, like CTRL_ATTR_MCAST_GROUPS
+
+    Each nested attribute is decoded by policy, in a list of the order.
+    """
+    def __init__(self, policy):
+        """create new instance
+
+        @type policy: AttrPolicy
+        @param policy: applied to each element
+        """
+        self.policy = policy
+
+
+class AttrPolicy(object):
+    """attribute type to data type map, compiled into a decoder
+
+    policy maps attribute type to one of:
+
+	- MnlAttrDataType value, validated as attr_validate()
+	- tuple of MnlAttrDataType value and expected length, as
+	  attr_validate2()
+	- AttrPolicy, MNL_TYPE_NESTED decoded by it to a dict
+	- NestedArray, MNL_TYPE_NESTED decoded to a list of dict
+
+    The decoder walks a message tree in a pass and returns a dict of
+    attribute type to python value. Integers are in host byte order,
+    strings are bytes as attr_get_str() and others are bytes copied from
+    the payload. Attributes which are above maxtype or not in policy are
+    ignored, and OSError is raised on a validation failure.
+
+    Strings are shared by the raw payload in intern, InternTable, if given.
+    Nested AttrPolicy uses its own.
+    """
+    def __init__(self, maxtype, policy, intern=None):
+        """compile policy
+
+        @type maxtype: number
+        @param maxtype: max attribute type, e.g. CTRL_ATTR_MAX
+        @type policy: dict
+        @param policy: attribute type to policy value above
+        @type intern: InternTable
+        @param intern: intern table for strings
+        """
+        self.maxtype = maxtype
+        self.intern = intern
+        self.policy = dict(policy)
+        self._table = [None] * (maxtype + 1) # (data_type, exp_len, decoder)
+        for attr_type, p in self.policy.items():
+            if attr_type > maxtype:
+                raise ValueError("attribute type %d is above maxtype" % attr_type)
+            self._table[attr_type] = self._compile(p)
+
+
+    def _compile(self, p):
+        if isinstance(p, AttrPolicy):
+            return (_libmnlh.MNL_TYPE_NESTED, 0, p.decode_payload)
+        if isinstance(p, NestedArray):
+            decode_payload = p.policy.decode_payload
+            return (_libmnlh.MNL_TYPE_NESTED, 0,
+                    lambda v: [decode_payload(e) for _t, e in _attr.attr_iter_payload(v)])
+        if isinstance(p, tuple):
+            data_type, exp_len = p
+        else:
+            data_type, exp_len = p, _data_type_len.get(p, 0)
+        if not 0 <= data_type < _libmnlh.MNL_TYPE_MAX:
+            raise ValueError("invalid data type: %r" % (data_type,))
+        return (data_type, exp_len, _decoder(data_type, exp_len, self.intern))
+
+
+    def decode_payload(self, payload):
+        """validate and decode attributes in payload
+
+        @type payload: buffer (bytearray, memoryview)
+        @param payload: attributes, see attr_parse_payload()
+
+        @rtype: dict
+        @return: attribute type to decoded value
+        """
+        table = self._table
+        maxtype = self.maxtype
+        ret = {}
+        for attr_type, v in _attr.attr_iter_payload(payload):
+            if attr_type > maxtype: continue
+            e = table[attr_type]
+            if e is None: continue
+            _validate(v, e[0], e[1])
+            ret[attr_type] = e[2](v)
+        return ret
+
+
+    def decode(self, nlh, offset):
+        """validate and decode attributes of Netlink message
+
+        @type nlh: Nlmsghdr
+        @param nlh: Netlink message
+        @type offset: number
+        @param offset: offset to the attributes from the payload
+
+        @rtype: dict
+        @return: attribute type to decoded value
+        """
+        v = nlh.view()
+        return self.decode_payload(v[_libmnlh.MNL_NLMSG_HDRLEN + _libmnlh.MNL_ALIGN(offset):])
+
+
+    def decode_nested(self, attr):
+        """validate and decode attributes nested in attr
+
+        @type attr: Nlattr or buffer
+        @param attr: nested attribute, or its payload
+
+        @rtype: dict
+        @return: attribute type to decoded value
+        """
+        if isinstance(attr, netlink.Nlattr):
+            return self.decode_payload(attr.view()[_libmnlh.MNL_ATTR_HDRLEN:])
+        return self.decode_payload(attr)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import mmap, weakref
+
+from . import _libmnlh
+from . import nlstruct
+
+"""
+receive buffer pool, not in libmnl
+"""
+
+def _page_align(size):
+    return (size + mmap.PAGESIZE - 1) & ~(mmap.PAGESIZE - 1)
+
+
+class BufferPool(object):
+    """fixed number of page aligned buffers to receive into
+
+    lease() returns a buffer, a ctypes array of c_ubyte. It is not required
+    to give back the buffer explicitly, it returns to the pool when it is
+    garbage, that is when all of memoryviews and ctypes objects like
+    Nlmsghdr or Nlattr created from it have gone away.
+
+    The buffer size can be changed by resize() or learned by adapt().
+
+    Counters:
+	- hits: lease() reused a buffer in the pool
+	- misses: lease() allocated a new buffer to the pool
+	- exhausted: all buffers were in use, lease() allocated a buffer
+	  which is not pooled
+	- resizes: the buffer size has been changed
+    """
+    # shrink after this number of datagrams in a row, each fits in a quarter
+    SHRINK_AFTER = 64
+
+    def __init__(self, size=_libmnlh.MNL_SOCKET_BUFFER_SIZE, count=16, max_size=32768):
+        """create new pool
+
+        @type size: number
+        @param size: each buffer size, rounded up to page size
+        @type count: number
+        @param count: max number of pooled buffers
+        @type max_size: number
+        @param max_size: upper limit adapt() grows to without need
+        """
+        self.count = count
+        self.min_size = _page_align(size)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.exhausted = 0
+        self.resizes = 0
+        self._nsmall = 0
+        self._nalloc = 0
+        self._free = []
+        self._leases = {}	# id(weakref to buffer): (weakref, mmap)
+        self._set_size(size)
+
+
+    def _set_size(self, size):
+        self.size = _page_align(size)
+        # created by type() with _type_ and _length_, which can be referred
+        # weakly unlike c_ubyte * size, and subclassing it fails on 2.7
+        self._buftype = nlstruct.ARRAY_TYPES.get(self.size)
+
+
+    def _release(self, ref):
+        _ref, mm = self._leases.pop(id(ref))
+        if len(mm) == self.size and len(self._free) < self.count:
+            self._free.append(mm)
+        else:
+            self._nalloc -= 1
+
+
+    def resize(self, size):
+        """change the buffer size
+
+        Free buffers in the pool are released, leased buffers are released
+        instead of returning to the pool.
+
+        @type size: number
+        @param size: new buffer size, rounded up to page size
+        """
+        if _page_align(size) == self.size:
+            return
+        self.clear()
+        self._set_size(size)
+        self.resizes += 1
+
+
+    def adapt(self, length):
+        """learn the buffer size from the length of a datagram to receive
+
+        Grows to fit length if the buffer is too small. A datagram filling
+        more than a half of the buffer is likely a part of dump, kernel
+        sizes those by the buffer length passed to recvmsg, so that the
+        buffer is doubled up to max_size to receive the dump in less
+        datagrams. Shrinks by half, not below the initial size, after
+        SHRINK_AFTER small datagrams like events.
+
+        @type length: number
+        @param length: the length of the datagram to receive
+        """
+        if length > self.size:
+            self._nsmall = 0
+            self.resize(length)
+        elif length > self.size // 2:
+            self._nsmall = 0
+            if self.size < self.max_size:
+                self.resize(min(self.size * 2, self.max_size))
+        elif length <= self.size // 4 and self.size > self.min_size:
+            self._nsmall += 1
+            if self._nsmall >= self.SHRINK_AFTER:
+                self._nsmall = 0
+                self.resize(max(self.size // 2, self.min_size))
+        else:
+            self._nsmall = 0
+
+
+    def lease(self):
+        """lease a buffer from the pool
+
+        @rtype: ctypes array of c_ubyte
+        @return: page aligned buffer sized self.size
+        """
+        if self._free:
+            self.hits += 1
+            mm = self._free.pop()
+        elif self._nalloc < self.count:
+            self.misses += 1
+            self._nalloc += 1
+            mm = mmap.mmap(-1, self.size)
+        else:
+            self.exhausted += 1
+            return self._buftype.from_buffer(mmap.mmap(-1, self.size))
+
+        buf = self._buftype.from_buffer(mm)
+        ref = weakref.ref(buf, self._release)
+        self._leases[id(ref)] = (ref, mm)
+        return buf
+
+
+    def in_use(self):
+        """returns the number of pooled buffers leased now
+        """
+        return len(self._leases)
+
+
+    def available(self):
+        """returns the number of buffers in the pool which can be leased
+        without allocation
+        """
+        return len(self._free)
+
+
+    def clear(self):
+        """release free buffers in the pool
+        """
+        self._nalloc -= len(self._free)
+        del self._free[:]
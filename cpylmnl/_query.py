@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+from . import _libmnlh
+from . import _attr
+from . import _policy
+
+"""
+compiled attribute path query, not in libmnl
+"""
+
+class _Node(object):
+    __slots__ = ("index", "decoder", "children")
+
+    def __init__(self):
+        self.index = None	# position in the result if a path ends here
+        self.decoder = None
+        self.children = {}	# attribute type: _Node
+
+
+class AttrQuery(object):
+    """extract attributes at paths across nests in a traversal
+
+    Paths are compiled into a tree of attribute types once, e.g.:
+
+        q = AttrQuery(("CTA_TUPLE_ORIG/CTA_TUPLE_IP/CTA_IP_V4_SRC",
+                       ("CTA_COUNTERS_ORIG/CTA_COUNTERS_BYTES", MNL_TYPE_U64)),
+                      nfnetlink_conntrackh)
+        src, nbytes = q.run(nlh, Nfgenmsg.csize())
+
+    A path is a string of names in namespace separated by "/", or a sequence
+    of attribute types. With MnlAttrDataType in a tuple, the value is decoded
+    as AttrPolicy does, but not validated, otherwise it is the payload as
+    memoryview. Nests which no path goes through are skipped.
+    """
+    def __init__(self, paths, namespace=None):
+        """compile paths
+
+        @type paths: sequence
+        @param paths: path, or tuple of path and MnlAttrDataType
+        @type namespace: module
+        @param namespace: resolves names in paths, e.g. nfnetlink_conntrackh
+        """
+        self.paths = tuple(paths)
+        self._root = _Node()
+        for i, p in enumerate(self.paths):
+            data_type = None
+            if isinstance(p, tuple) and len(p) == 2 and isinstance(p[0], (str, tuple, list)):
+                p, data_type = p
+            node = self._root
+            for attr_type in self._resolve(p, namespace):
+                node = node.children.setdefault(attr_type, _Node())
+            if node.index is not None:
+                raise ValueError("duplicated path: %r" % (p,))
+            node.index = i
+            if data_type is not None:
+                node.decoder = _policy._decoder(data_type, 0)
+        self._check(self._root)
+
+
+    def _resolve(self, path, namespace):
+        if not isinstance(path, str):
+            return tuple(path)
+        types = []
+        for name in path.split("/"):
+            if namespace is None or not hasattr(namespace, name):
+                raise ValueError("unknown attribute name: %s" % name)
+            types.append(getattr(namespace, name))
+        return tuple(types)
+
+
+    def _check(self, node):
+        for child in node.children.values():
+            if child.index is not None and child.children:
+                raise ValueError("path ends at a nest of another path: %r"
+                                 % (self.paths[child.index],))
+            self._check(child)
+
+
+    def _walk(self, v, offset, end, node, ret):
+        hdrlen = _libmnlh.MNL_ATTR_HDRLEN
+        children = node.children
+        for nla_type, offset, nla_len in _attr._attr_walk(v, offset, end):
+            child = children.get(nla_type)
+            if child is None:
+                continue
+            if child.index is not None:
+                payload = v[offset + hdrlen:offset + nla_len]
+                if child.decoder is not None:
+                    payload = child.decoder(payload)
+                ret[child.index] = payload
+            else:
+                self._walk(v, offset + hdrlen, offset + nla_len, child, ret)
+
+
+    def run_payload(self, payload):
+        """run the query over attributes in payload
+
+        @type payload: buffer (bytearray, memoryview)
+        @param payload: attributes, see attr_parse_payload()
+
+        @rtype: list
+        @return: values in the order of paths, None if not found
+        """
+        ret = [None] * len(self.paths)
+        v = memoryview(payload)
+        self._walk(v, 0, len(v), self._root, ret)
+        return ret
+
+
+    def run(self, nlh, offset):
+        """run the query over attributes of Netlink message
+
+        @type nlh: Nlmsghdr
+        @param nlh: Netlink message
+        @type offset: number
+        @param offset: offset to the attributes from the payload
+
+        @rtype: list
+        @return: values in the order of paths, None if not found
+        """
+        ret = [None] * len(self.paths)
+        v = nlh.view()
+        self._walk(v, _libmnlh.MNL_NLMSG_HDRLEN + _libmnlh.MNL_ALIGN(offset), len(v),
+                   self._root, ret)
+        return ret
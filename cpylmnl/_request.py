@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import errno, time, select
+
+from .linux import netlinkh as netlink
+from . import _socket
+from . import _nlmsg
+from . import _pool
+
+"""
+pipelined request / acknowledgement engine, not in libmnl
+"""
+
+class Request(object):
+    """a request in RequestEngine
+
+	- seq: allocated sequence number
+	- replies: data messages replied, Nlmsghdr
+	- error: None while in flight, 0 on success or errno
+	- interrupted: NLM_F_DUMP_INTR has been found in the replies
+    """
+    __slots__ = ("seq", "replies", "error", "interrupted", "callback")
+
+    def __init__(self, seq, callback):
+        self.seq = seq
+        self.replies = []
+        self.error = None
+        self.interrupted = False
+        self.callback = callback
+
+
+    def done(self):
+        return self.error is not None
+
+
+    def check(self):
+        """raise OSError if the request has failed
+        """
+        if self.error:
+            raise OSError(self.error, errno.errorcode.get(self.error, "(unknown errno)"))
+
+
+class RequestEngine(object):
+    """keep requests in flight and match replies by sequence number
+
+    submit() allocates a sequence number for the request, sets NLM_F_ACK and
+    sends it without waiting for the reply, unless window requests are in
+    flight already. Replies are routed to the request by nlmsg_seq, and
+    nlmsg_pid by nlmsg_portid_ok(). A request completes by its
+    acknowledgement, NLMSG_ERROR, or NLMSG_DONE of dump. A dump which has
+    NLM_F_DUMP_INTR is consumed until its NLMSG_DONE, dropping the rest of
+    replies, then completes with EINTR.
+
+	- unmatched: messages which no request in flight matched
+    """
+    def __init__(self, nl, window=64, pool=None):
+        """create new instance
+
+        @type nl: c_void_p
+        @param nl: bound mnl socket
+        @type window: number
+        @param window: max number of requests in flight
+        @type pool: BufferPool
+        @param pool: pool to receive into
+        """
+        self.nl = nl
+        self.window = window
+        self.pool = pool or _pool.BufferPool()
+        self.portid = _socket.socket_get_portid(nl)
+        self.unmatched = 0
+        self._fd = _socket.socket_get_fd(nl)
+        self._seq = int(time.time())
+        self._inflight = {} # seq: Request
+
+
+    def next_seq(self):
+        """allocate a sequence number, never 0
+        """
+        self._seq = (self._seq + 1) & 0xffffffff or 1
+        return self._seq
+
+
+    def inflight(self):
+        """returns the number of requests in flight
+        """
+        return len(self._inflight)
+
+
+    def submit(self, nlh, callback=None):
+        """send a request
+
+        @type nlh: Nlmsghdr
+        @param nlh: request message, nlmsg_seq is overwritten
+        @type callback: callable
+        @param callback: called with Request when it has completed
+
+        @rtype: Request
+        @return: the request in flight
+        """
+        while len(self._inflight) >= self.window:
+            self.process()
+        req = Request(self.next_seq(), callback)
+        nlh.nlmsg_seq = req.seq
+        nlh.nlmsg_flags |= netlink.NLM_F_ACK
+        _socket.socket_send_nlmsg(self.nl, nlh)
+        self._inflight[req.seq] = req
+        return req
+
+
+    def _complete(self, req, error):
+        req.error = error
+        del self._inflight[req.seq]
+        if req.callback is not None:
+            req.callback(req)
+
+
+    def _intr_error(self, req):
+        return req.interrupted and errno.EINTR or 0
+
+
+    def process(self, timeout=None):
+        """receive a datagram and route its messages
+
+        @type timeout: number
+        @param timeout: seconds to wait for, None blocks
+
+        @rtype: number
+        @return: the number of routed messages
+        """
+        if timeout is not None:
+            rlist, _wlist, _xlist = select.select([self._fd], [], [], timeout)
+            if not rlist:
+                return 0
+
+        n = 0
+        for nlh in _nlmsg.nlmsg_iter(_socket.socket_recv_auto(self.nl, self.pool)):
+            req = self._inflight.get(nlh.nlmsg_seq)
+            if req is None or not _nlmsg.nlmsg_portid_ok(nlh, self.portid):
+                self.unmatched += 1
+                continue
+            n += 1
+            if nlh.nlmsg_flags & netlink.NLM_F_DUMP_INTR:
+                # kernel continues the dump, complete by its NLMSG_DONE
+                req.interrupted = True
+            if nlh.nlmsg_type == netlink.NLMSG_ERROR:
+                if nlh.nlmsg_len < _nlmsg.nlmsg_size(netlink.Nlmsgerr.csize()):
+                    self._complete(req, errno.EBADMSG)
+                else:
+                    err = _nlmsg.nlmsg_get_payload_as(nlh, netlink.Nlmsgerr)
+                    self._complete(req, abs(err.error) or self._intr_error(req))
+            elif nlh.nlmsg_type == netlink.NLMSG_DONE:
+                self._complete(req, self._intr_error(req))
+            elif nlh.nlmsg_type >= netlink.NLMSG_MIN_TYPE and not req.interrupted:
+                req.replies.append(nlh)
+        return n
+
+
+    def wait(self, req):
+        """process until the request completes
+
+        @rtype: Request
+        @return: req
+        """
+        while not req.done():
+            self.process()
+        return req
+
+
+    def flush(self):
+        """process until all requests in flight complete
+        """
+        while self._inflight:
+            self.process()
@@ -2,9 +2,10 @@
 
 from __future__ import print_function, absolute_import
 
-import ctypes
+import errno, ctypes, socket
 
 from .linux import netlinkh as netlink
+from . import nlstruct
 from . import _cproto
 
 # int mnl_socket_get_fd(const struct mnl_socket *nl)
@@ -67,17 +68,107 @@ def socket_sendto(nl, buf):
         ret = _cproto.c_socket_sendto(nl, None, 0)
     else:
         # require mutable buffer
-        c_buf = (ctypes.c_ubyte * len(buf)).from_buffer(buf)
+        c_buf = nlstruct.ubyte_array_of(buf)
         ret = _cproto.c_socket_sendto(nl, c_buf, len(buf))
     if ret < 0: raise _cproto.os_error()
     return ret
 
 def socket_send_nlmsg(nl, nlh):
-    c_buf = (ctypes.c_ubyte * nlh.nlmsg_len).from_address(ctypes.addressof(nlh))
+    c_buf = nlstruct.ubyte_array_at(ctypes.addressof(nlh), nlh.nlmsg_len)
     ret = _cproto.c_socket_sendto(nl, c_buf, len(c_buf))
     if ret < 0: raise _cproto.os_error()
     return ret
 
+def _nlmsg_buf(msg):
+    # Nlmsghdr is sent nlmsg_len long as socket_send_nlmsg()
+    if isinstance(msg, netlink.Nlmsghdr):
+        return nlstruct.ubyte_array_at(ctypes.addressof(msg), msg.nlmsg_len)
+    return nlstruct.ubyte_array_of(msg)
+
+def _iov_buf(buf):
+    # returns (keep, address, length) of an iovec element
+    if isinstance(buf, bytes):
+        # c_char_p points to bytes itself, the kernel only reads it
+        c_buf = ctypes.c_char_p(buf)
+        return c_buf, ctypes.cast(c_buf, ctypes.c_void_p).value, len(buf)
+    if isinstance(buf, netlink.Nlmsghdr):
+        return buf, ctypes.addressof(buf), buf.nlmsg_len
+    if len(buf) == 0:
+        return None, None, 0
+    try:
+        c_buf = nlstruct.ubyte_array_of(buf)
+    except TypeError: # read only, e.g. memoryview of bytes
+        c_buf = ctypes.create_string_buffer(_cproto.buffer_bytes(buf), len(buf))
+    return c_buf, ctypes.addressof(c_buf), len(c_buf)
+
+# ssize_t sendmsg(int sockfd, const struct msghdr *msg, int flags)
+def socket_sendmsg(nl, bufs, flags=0):
+    """send buffers as a netlink datagram by one sendmsg(2) call
+
+    The kernel gathers bufs in order, so that a message can be sent from
+    pieces without joining them, e.g. a header built in a bytearray and
+    a large payload in memoryview. Unlike socket_sendto(), bytes is sent
+    without a copy, only read only buffer other than bytes is copied.
+
+    @type bufs: list of buffer or Nlmsghdr
+    @param bufs: pieces of the datagram, Nlmsghdr is nlmsg_len long
+    @type flags: number
+    @param flags: flags passed to sendmsg(2)
+
+    @rtype: number
+    @return: the number of sent bytes
+    """
+    vlen = len(bufs)
+    refs = [_iov_buf(buf) for buf in bufs]
+    addr = netlink.SockaddrNl(nl_family=socket.AF_NETLINK)
+    iovs = (_cproto.Iovec * vlen)()
+    for i, (_keep, address, length) in enumerate(refs):
+        iovs[i].iov_base = address
+        iovs[i].iov_len = length
+    hdr = _cproto.Msghdr()
+    hdr.msg_name = ctypes.addressof(addr)
+    hdr.msg_namelen = ctypes.sizeof(addr)
+    hdr.msg_iov = iovs
+    hdr.msg_iovlen = vlen
+
+    ret = _cproto.c_sendmsg(_cproto.c_socket_get_fd(nl), hdr, flags)
+    if ret < 0: raise _cproto.os_error()
+    return ret
+
+# int sendmmsg(int sockfd, struct mmsghdr *msgvec, unsigned int vlen, int flags)
+def socket_send_many(nl, msgs, flags=0):
+    """send several netlink datagrams to the kernel by one sendmmsg(2) call
+
+    Each element of msgs is sent as a datagram, which is a mutable buffer
+    like socket_sendto() requires, e.g. NlmsgBatch head, or Nlmsghdr like
+    socket_send_nlmsg().
+
+    @type msgs: list of buffer (bytearray) or Nlmsghdr
+    @param msgs: datagrams to send
+    @type flags: number
+    @param flags: flags passed to sendmmsg(2)
+
+    @rtype: number
+    @return: the number of datagrams the kernel accepted, from the head of msgs
+    """
+    vlen = len(msgs)
+    c_bufs = [_nlmsg_buf(msg) for msg in msgs]
+    addr = netlink.SockaddrNl(nl_family=socket.AF_NETLINK)
+    iovs = (_cproto.Iovec * vlen)()
+    mmsgs = (_cproto.Mmsghdr * vlen)()
+    for i, c_buf in enumerate(c_bufs):
+        iovs[i].iov_base = ctypes.addressof(c_buf)
+        iovs[i].iov_len = len(c_buf)
+        hdr = mmsgs[i].msg_hdr
+        hdr.msg_name = ctypes.addressof(addr)
+        hdr.msg_namelen = ctypes.sizeof(addr)
+        hdr.msg_iov = ctypes.pointer(iovs[i])
+        hdr.msg_iovlen = 1
+
+    ret = _cproto.c_sendmmsg(_cproto.c_socket_get_fd(nl), mmsgs, vlen, flags)
+    if ret < 0: raise _cproto.os_error()
+    return ret
+
 # ssize_t
 # mnl_socket_recvfrom(const struct mnl_socket *nl, void *buf, size_t bufsiz)
 def socket_recv(nl, size):
@@ -86,15 +177,133 @@ def socket_recv(nl, size):
     ret = socket_recv_into(nl, buf)
     if ret < 0: raise _cproto.os_error()
     # We did not read as many bytes as we anticipated, resize the
-    # string if possible and be successful.
-    return buf[:ret]
+    # string in place and be successful.
+    del buf[ret:]
+    return buf
 
 def socket_recv_into(nl, buf):
-    c_buf = (ctypes.c_char * len(buf)).from_buffer(buf)
-    ret = _cproto.c_socket_recvfrom(nl, c_buf, len(c_buf))
+    # require mutable buffer, memoryview slice can be used
+    c_buf = ctypes.c_char.from_buffer(buf)
+    ret = _cproto.c_socket_recvfrom(nl, ctypes.byref(c_buf), len(buf))
+    if ret < 0: raise _cproto.os_error()
+    return ret
+
+def socket_recv_view(nl, buf):
+    """receive a netlink datagram without copy
+
+    Unlike socket_recv(), buf is reused and no new buffer is allocated. The
+    returned memoryview shares buf, its contents are valid until the next
+    receive into the same buf.
+
+    @type buf: buffer (bytearray)
+    @param buf: mutable buffer to store the datagram
+
+    @rtype: memoryview
+    @return: view of buf, limited to the received length
+    """
+    ret = socket_recv_into(nl, buf)
+    return memoryview(buf)[:ret]
+
+def socket_recv_pooled(nl, pool):
+    """receive a netlink datagram into a buffer leased from BufferPool
+
+    The buffer returns to the pool when the returned memoryview and all of
+    objects created from it, e.g. Nlmsghdr or Nlattr stored by callbacks,
+    have gone away.
+
+    @type pool: BufferPool
+    @param pool: pool to lease a buffer from
+
+    @rtype: memoryview
+    @return: view of leased buffer, limited to the received length
+    """
+    buf = pool.lease()
+    ret = socket_recv_into(nl, buf)
+    return memoryview(buf)[:ret]
+
+def socket_recv_pending(nl):
+    """returns the length of the next datagram without receiving it
+
+    recv(2) with MSG_PEEK|MSG_TRUNC, which blocks until a datagram arrives
+    unless the socket is non-blocking.
+
+    @rtype: number
+    @return: the real length of the pending datagram
+    """
+    ret = _cproto.c_recv(_cproto.c_socket_get_fd(nl), None, 0,
+                         _cproto.MSG_PEEK | _cproto.MSG_TRUNC)
     if ret < 0: raise _cproto.os_error()
     return ret
 
+def socket_recv_auto(nl, pool):
+    """receive a netlink datagram into BufferPool lease, sizing the pool
+
+    Peeks the pending datagram length and lets the pool adapt to it by
+    BufferPool.adapt() before receiving, so that the datagram is never
+    truncated.
+
+    @type pool: BufferPool
+    @param pool: pool to lease a buffer from
+
+    @rtype: memoryview
+    @return: view of leased buffer, limited to the received length
+    """
+    pool.adapt(socket_recv_pending(nl))
+    return socket_recv_pooled(nl, pool)
+
+# int recvmmsg(int sockfd, struct mmsghdr *msgvec, unsigned int vlen,
+#              int flags, struct timespec *timeout)
+def socket_recv_many(nl, bufs, flags=_cproto.MSG_WAITFORONE):
+    """receive several netlink datagrams by one recvmmsg(2) call
+
+    Each buffer in bufs receives at most one datagram. By default
+    MSG_WAITFORONE is passed so that this function blocks only until the
+    first datagram arrives, then returns whatever else has been queued.
+    Same as mnl_socket_recvfrom(), truncated datagram raises OSError with
+    ENOSPC and a datagram not from struct sockaddr_nl raises EINVAL, only
+    if it is the first one. Since the others are already taken from the
+    socket, a bad one after the first is reported by its errno in the
+    returned list instead, e.g. [(36, 0), (16, ENOSPC), (36, 0)].
+
+    @type bufs: list of buffer (bytearray)
+    @param bufs: mutable buffers to store the datagrams
+    @type flags: number
+    @param flags: flags passed to recvmmsg(2)
+
+    @rtype: list of tuple (number, number)
+    @return: (received length, errno) of each buffer, from the head of
+    	bufs. errno is 0 for a good datagram
+    """
+    vlen = len(bufs)
+    c_bufs = [(ctypes.c_char * len(buf)).from_buffer(buf) for buf in bufs]
+    addrs = (netlink.SockaddrNl * vlen)()
+    iovs = (_cproto.Iovec * vlen)()
+    msgs = (_cproto.Mmsghdr * vlen)()
+    for i, c_buf in enumerate(c_bufs):
+        iovs[i].iov_base = ctypes.addressof(c_buf)
+        iovs[i].iov_len = len(c_buf)
+        hdr = msgs[i].msg_hdr
+        hdr.msg_name = ctypes.addressof(addrs[i])
+        hdr.msg_namelen = ctypes.sizeof(netlink.SockaddrNl)
+        hdr.msg_iov = ctypes.pointer(iovs[i])
+        hdr.msg_iovlen = 1
+
+    ret = _cproto.c_recvmmsg(_cproto.c_socket_get_fd(nl), msgs, vlen, flags, None)
+    if ret < 0: raise _cproto.os_error()
+
+    lens = []
+    for i in range(ret):
+        hdr = msgs[i].msg_hdr
+        en = 0
+        if hdr.msg_flags & _cproto.MSG_TRUNC:
+            en = errno.ENOSPC
+        elif hdr.msg_namelen != ctypes.sizeof(netlink.SockaddrNl):
+            en = errno.EINVAL
+        if en and i == 0:
+            raise OSError(en, errno.errorcode[en])
+        lens.append((msgs[i].msg_len, en))
+    return lens
+
 # int mnl_socket_close(struct mnl_socket *nl)
 def socket_close(nl):
     ret = _cproto.c_socket_close(nl)
@@ -104,7 +313,7 @@ def socket_close(nl):
 # int mnl_socket_setsockopt(const struct mnl_socket *nl, int type,
 #                           void *buf, socklen_t len)
 def socket_setsockopt(nl, optype, buf):
-    c_buf = (ctypes.c_ubyte * len(buf)).from_buffer_copy(buf)
+    c_buf = nlstruct.ARRAY_TYPES.get(len(buf)).from_buffer_copy(buf)
     ret = _cproto.c_socket_setsockopt(nl, optype, c_buf, len(buf))
     if ret < 0: raise _cproto.os_error()
 
@@ -118,6 +327,29 @@ def socket_getsockopt(nl, optype, size):
     if ret < 0: raise _cproto.os_error()
     return c_buf.raw
 
+def socket_set_rcvbuf(nl, size, force=True):
+    """set the receive buffer size of the socket
+
+    SO_RCVBUFFORCE, which requires CAP_NET_ADMIN, overrides
+    net.core.rmem_max. Falls back to SO_RCVBUF on EPERM.
+
+    @type size: number
+    @param size: buffer size in bytes, kernel doubles it
+    @type force: bool
+    @param force: use SO_RCVBUFFORCE
+    """
+    fd = _cproto.c_socket_get_fd(nl)
+    c_size = ctypes.c_int(size)
+    if force:
+        ret = _cproto.c_setsockopt(fd, _cproto.SOL_SOCKET, _cproto.SO_RCVBUFFORCE,
+                                   ctypes.byref(c_size), ctypes.sizeof(c_size))
+        if ret == 0: return
+        err = _cproto.os_error()
+        if err.errno != errno.EPERM: raise err
+    ret = _cproto.c_setsockopt(fd, _cproto.SOL_SOCKET, _cproto.SO_RCVBUF,
+                               ctypes.byref(c_size), ctypes.sizeof(c_size))
+    if ret < 0: raise _cproto.os_error()
+
 def socket_getsockopt_ctype(nl, optype, cls):
     optval = cls.__new__(cls)
     try:
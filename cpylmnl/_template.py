@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import struct
+
+from .linux import netlinkh as netlink
+from . import _libmnlh
+from . import _attr
+
+"""
+message template patched in place, not in libmnl
+"""
+
+_field_structs = {
+    1: "B",
+    2: "H",
+    4: "I",
+    8: "Q",
+}
+
+
+class NlmsgTemplate(object):
+    """a built message reused by patching its fields in place
+
+    The message is copied once, and slots are declared at fixed offsets in
+    it, a header field or a fixed size attribute payload. patch() writes the
+    slot values by struct.pack_into() and returns the buffer to send, e.g.
+    for a verdict of NFQUEUE:
+
+        t = NlmsgTemplate(nlh, Nfgenmsg.csize())
+        t.header_slot("seq", "nlmsg_seq")
+        t.attr_slot("verdict", NFQA_VERDICT_HDR, ">I", 0)
+        t.attr_slot("id", NFQA_VERDICT_HDR, ">I", 4)
+        socket_sendto(nl, t.patch(seq=seq, verdict=NF_ACCEPT, id=packet_id))
+
+    Since the buffer is reused, it must be sent before the next patch().
+    """
+    def __init__(self, msg, offset=0):
+        """create new instance
+
+        @type msg: Nlmsghdr or buffer
+        @param msg: built message, copied
+        @type offset: number
+        @param offset: offset to the attributes from the payload
+        """
+        if isinstance(msg, netlink.Nlmsghdr):
+            msg = msg.view()
+        self.buf = bytearray(msg)
+        self.offset = offset
+        self._slots = {} # name: (pack_into, offset)
+
+
+    def slot(self, name, offset, fmt):
+        """declare a slot at offset in the message
+
+        @type name: str
+        @param name: keyword of patch()
+        @type offset: number
+        @param offset: from the beginning of the message
+        @type fmt: str
+        @param fmt: struct format of a value, e.g. ">I"
+        """
+        s = struct.Struct(fmt)
+        if len(s.unpack(bytes(bytearray(s.size)))) != 1:
+            raise ValueError("format of a value is required: %s" % fmt)
+        if offset < 0 or offset + s.size > len(self.buf):
+            raise ValueError("slot is out of the message: %s" % name)
+        self._slots[name] = (s.pack_into, offset)
+
+
+    def header_slot(self, name, field):
+        """declare a slot of Nlmsghdr field, e.g. "nlmsg_seq"
+        """
+        f = getattr(netlink.Nlmsghdr, field)
+        self.slot(name, f.offset, "=" + _field_structs[f.size])
+
+
+    def attr_slot(self, name, path, fmt, pos=0):
+        """declare a slot in attribute payload
+
+        @type path: number or tuple
+        @param path: attribute type, or types from the outermost nest
+        @type fmt: str
+        @param fmt: struct format of a value
+        @type pos: number
+        @param pos: offset in the payload
+        """
+        if not isinstance(path, tuple):
+            path = (path, )
+        tb = _attr.attr_parse_table(self.buf, self.offset, path[0])
+        attr_offset = tb[path[0]]
+        for attr_type in path[1:]:
+            if attr_offset is None: break
+            tb = _attr.attr_parse_table_nested(self.buf, attr_offset, attr_type)
+            attr_offset = tb[attr_type]
+        if attr_offset is None:
+            raise ValueError("attribute is not found: %r" % (path, ))
+        payload_len = _attr._nlattr_struct.unpack_from(self.buf, attr_offset)[0] \
+                      - _libmnlh.MNL_ATTR_HDRLEN
+        if pos + struct.calcsize(fmt) > payload_len:
+            raise ValueError("slot is out of the attribute: %s" % name)
+        self.slot(name, attr_offset + _libmnlh.MNL_ATTR_HDRLEN + pos, fmt)
+
+
+    def patch(self, **values):
+        """write slot values
+
+        @rtype: bytearray
+        @return: the message, reused by the next patch()
+        """
+        buf = self.buf
+        slots = self._slots
+        for name, value in values.items():
+            pack_into, offset = slots[name]
+            pack_into(buf, offset, value)
+        return buf
+
+
+    def nlmsghdr(self):
+        """returns Nlmsghdr sharing the message
+        """
+        return netlink.Nlmsghdr.from_buffer(self.buf)
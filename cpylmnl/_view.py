@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function
+
+import errno, struct
+
+from .linux import netlinkh as netlink
+from . import _libmnlh
+from . import _attr
+
+"""
+lazy attribute view, not in libmnl
+"""
+
+_u8 = struct.Struct("=B")
+_u16 = struct.Struct("=H")
+_u32 = struct.Struct("=I")
+_u64 = struct.Struct("=Q")
+_be16 = struct.Struct(">H")
+_be32 = struct.Struct(">I")
+_be64 = struct.Struct(">Q")
+
+
+class AttrView(object):
+    """attributes in a buffer, decoded only on access
+
+    The attributes are indexed by type in a pass on the first access, then
+    getters unpack only the requested value from the buffer. view[type]
+    returns the view of a nested attribute, sharing the buffer, so that:
+
+        view[CTA_TUPLE_ORIG][CTA_TUPLE_IP].get_u32(CTA_IP_V4_SRC)
+
+    Missing attribute raises KeyError. The last one wins on duplicates.
+    """
+    __slots__ = ("_buf", "_start", "_end", "_tb")
+
+    def __init__(self, buf, start=0, end=None):
+        """create new instance
+
+        @type buf: buffer
+        @param buf: buffer the attributes are in
+        @type start: number
+        @param start: offset of the first attribute
+        @type end: number
+        @param end: offset of the end of attributes, len(buf) if None
+        """
+        self._buf = memoryview(buf)
+        self._start = start
+        if end is None:
+            end = len(self._buf)
+        self._end = end
+        self._tb = None
+
+
+    @classmethod
+    def from_nlmsg(cls, nlh, offset):
+        """create the view of attributes in Netlink message
+
+        @type nlh: Nlmsghdr
+        @param nlh: Netlink message
+        @type offset: number
+        @param offset: offset to the attributes from the payload
+        """
+        v = nlh.view()
+        return cls(v, _libmnlh.MNL_NLMSG_HDRLEN + _libmnlh.MNL_ALIGN(offset), len(v))
+
+
+    @classmethod
+    def from_attr(cls, attr):
+        """create the view of attributes nested in attr
+
+        @type attr: Nlattr
+        @param attr: nested attribute
+        """
+        v = attr.view()
+        return cls(v, _libmnlh.MNL_ATTR_HDRLEN, len(v))
+
+
+    def _index(self):
+        tb = {}
+        for nla_type, offset, _nla_len in _attr._attr_walk(self._buf, self._start, self._end):
+            tb[nla_type] = offset
+        self._tb = tb
+        return tb
+
+
+    def _table(self):
+        tb = self._tb
+        if tb is None:
+            tb = self._index()
+        return tb
+
+
+    def offset(self, attr_type):
+        """returns the offset of attribute in the buffer, raises KeyError
+        """
+        return self._table()[attr_type]
+
+
+    def __contains__(self, attr_type):
+        return attr_type in self._table()
+
+
+    def __len__(self):
+        return len(self._table())
+
+
+    def __iter__(self):
+        """iterate over attribute types in the view
+        """
+        return iter(self._table())
+
+
+    def __getitem__(self, attr_type):
+        """returns the view of a nested attribute
+        """
+        offset = self._table()[attr_type]
+        nla_len = _u16.unpack_from(self._buf, offset)[0]
+        return AttrView(self._buf, offset + _libmnlh.MNL_ATTR_HDRLEN, offset + nla_len)
+
+
+    def get_attr(self, attr_type):
+        """returns Nlattr sharing the buffer, which must be writable
+        """
+        return netlink.Nlattr.from_buffer(self._buf, self.offset(attr_type))
+
+
+    def get_payload(self, attr_type):
+        """returns the payload as memoryview
+        """
+        offset = self._table()[attr_type]
+        nla_len = _u16.unpack_from(self._buf, offset)[0]
+        return self._buf[offset + _libmnlh.MNL_ATTR_HDRLEN:offset + nla_len]
+
+
+    def get_u8(self, attr_type):
+        return _u8.unpack_from(self._buf, self._table()[attr_type] + _libmnlh.MNL_ATTR_HDRLEN)[0]
+
+
+    def get_u16(self, attr_type):
+        return _u16.unpack_from(self._buf, self._table()[attr_type] + _libmnlh.MNL_ATTR_HDRLEN)[0]
+
+
+    def get_u32(self, attr_type):
+        return _u32.unpack_from(self._buf, self._table()[attr_type] + _libmnlh.MNL_ATTR_HDRLEN)[0]
+
+
+    def get_u64(self, attr_type):
+        return _u64.unpack_from(self._buf, self._table()[attr_type] + _libmnlh.MNL_ATTR_HDRLEN)[0]
+
+
+    def get_be16(self, attr_type):
+        return _be16.unpack_from(self._buf, self._table()[attr_type] + _libmnlh.MNL_ATTR_HDRLEN)[0]
+
+
+    def get_be32(self, attr_type):
+        return _be32.unpack_from(self._buf, self._table()[attr_type] + _libmnlh.MNL_ATTR_HDRLEN)[0]
+
+
+    def get_be64(self, attr_type):
+        return _be64.unpack_from(self._buf, self._table()[attr_type] + _libmnlh.MNL_ATTR_HDRLEN)[0]
+
+
+    def get_in_addr(self, attr_type, intern=None):
+        """returns IPv4 address as attr_get_in_addr()
+        """
+        return self._get_addr(attr_type, 4, _attr._ntop_in, intern)
+
+
+    def get_in6_addr(self, attr_type, intern=None):
+        """returns IPv6 address as attr_get_in6_addr()
+        """
+        return self._get_addr(attr_type, 16, _attr._ntop_in6, intern)
+
+
+    def get_lladdr(self, attr_type, intern=None):
+        """returns link layer address as attr_get_lladdr()
+        """
+        payload = self.get_payload(attr_type)
+        if intern is None:
+            return _attr._ntop_ll(payload.tobytes())
+        return intern.get(payload.tobytes(), _attr._ntop_ll)
+
+
+    def _get_addr(self, attr_type, size, ntop, intern):
+        payload = self.get_payload(attr_type)
+        if len(payload) < size:
+            raise OSError(errno.ERANGE, errno.errorcode[errno.ERANGE])
+        b = payload[:size].tobytes()
+        if intern is None:
+            return ntop(b)
+        return intern.get(b, ntop)
+
+
+    def get_str(self, attr_type, intern=None):
+        """returns bytes until NUL, as attr_get_str()
+        """
+        b = self.get_payload(attr_type).tobytes()
+        if intern is None:
+            return _attr._cstr(b)
+        return intern.get(b, _attr._cstr)
@@ -32,6 +32,14 @@ NETLINK_INET_DIAG	= NETLINK_SOCK_DIAG
 
 MAX_LINKS = 32		
 
+class SockaddrNl(ctypes.Structure):
+    """struct sockaddr_nl
+    """
+    _fields_ = [("nl_family",	ctypes.c_ushort), # __kernel_sa_family_t nl_family	/* AF_NETLINK	*/
+                ("nl_pad",	ctypes.c_ushort), # unsigned short nl_pad		/* zero		*/
+                ("nl_pid",	ctypes.c_uint32), # __u32 nl_pid			/* port ID	*/
+                ("nl_groups",	ctypes.c_uint32)] # __u32 nl_groups		/* multicast groups mask */
+
 class Nlmsghdr(NLStructure):
     """struct nlmsghdr
     """
@@ -2,7 +2,130 @@
 
 from __future__ import absolute_import, print_function
 
-import sys, os, ctypes
+import sys, os, ctypes, collections
+
+class ArrayTypeCache(object):
+    """bounded LRU cache of ctypes array types
+
+    Types made by ``c_ubyte * n`` are kept in ctypes internal cache forever,
+    POINTER() types in ctypes._pointer_type_cache too. Types here are created
+    without them and dropped when evicted.
+
+	- hits: types found in the cache
+	- misses: types created
+	- evictions: types dropped over maxsize
+    """
+    def __init__(self, maxsize=256):
+        """create new instance
+
+        @type maxsize: number
+        @param maxsize: max number of types, 0 or less disables the cache
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._types = collections.OrderedDict() # (itemtype, length): type
+
+
+    def get(self, length, itemtype=ctypes.c_ubyte):
+        """returns the array type, same as itemtype * length
+        """
+        key = (itemtype, length)
+        try:
+            t = self._types.pop(key)
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            t = type("%s_Array_%d" % (itemtype.__name__, length), (ctypes.Array, ),
+                     {"_type_": itemtype, "_length_": length})
+            if self.maxsize <= 0:
+                return t
+            while len(self._types) >= self.maxsize:
+                self._types.popitem(last=False)
+                self.evictions += 1
+        self._types[key] = t
+        return t
+
+
+    def __len__(self):
+        return len(self._types)
+
+
+    def clear(self):
+        self._types.clear()
+
+
+ARRAY_TYPES = ArrayTypeCache()
+
+
+if sys.version_info[0] < 3:
+    class _PyBuffer(ctypes.Structure):
+        """Py_buffer of Python 2.7
+        """
+        _fields_ = [("buf",		ctypes.c_void_p),
+                    ("obj",		ctypes.py_object),
+                    ("len",		ctypes.c_ssize_t),
+                    ("itemsize",	ctypes.c_ssize_t),
+                    ("readonly",	ctypes.c_int),
+                    ("ndim",		ctypes.c_int),
+                    ("format",		ctypes.c_char_p),
+                    ("shape",		ctypes.c_void_p),
+                    ("strides",		ctypes.c_void_p),
+                    ("suboffsets",	ctypes.c_void_p),
+                    ("smalltable",	ctypes.c_ssize_t * 2),
+                    ("internal",	ctypes.c_void_p)]
+
+    _PyBUF_WRITABLE = 0x0001
+    _get_buffer = ctypes.pythonapi.PyObject_GetBuffer
+    _get_buffer.argtypes = [ctypes.py_object, ctypes.POINTER(_PyBuffer), ctypes.c_int]
+    _release_buffer = ctypes.pythonapi.PyBuffer_Release
+    _release_buffer.argtypes = [ctypes.POINTER(_PyBuffer)]
+
+    def _memoryview_address(buf):
+        # the memoryview keeps the export, the address is valid while it lives
+        pb = _PyBuffer()
+        try:
+            _get_buffer(buf, pb, _PyBUF_WRITABLE)
+        except (BufferError, TypeError):
+            raise TypeError("expected a writeable buffer object")
+        _release_buffer(pb)
+        return pb.buf, pb.len
+
+
+def from_buffer(cls, buf, offset=0):
+    """cls.from_buffer(), which accepts memoryview on Python 2 too
+
+    ctypes of Python 2 takes old buffer interface only, that memoryview
+    does not provide. The instance is created at the address of memoryview
+    then, and keeps it alive as from_buffer() does.
+    """
+    if sys.version_info[0] >= 3 or not isinstance(buf, memoryview):
+        return type(cls).from_buffer(cls, buf, offset)
+    address, length = _memoryview_address(buf)
+    if offset < 0:
+        raise ValueError("offset cannot be negative")
+    if length < offset + ctypes.sizeof(cls):
+        raise ValueError("Buffer size too small (%d instead of at least %d bytes)"
+                         % (length, offset + ctypes.sizeof(cls)))
+    v = cls.from_address(address + offset)
+    v._base = buf
+    return v
+
+
+def ubyte_array_at(address, length):
+    """returns c_ubyte array of length at address, without POINTER type
+    """
+    return ARRAY_TYPES.get(length).from_address(address)
+
+
+def ubyte_array_of(buf, length=None):
+    """returns c_ubyte array sharing buf
+    """
+    if length is None:
+        length = len(buf)
+    return from_buffer(ARRAY_TYPES.get(length), buf)
+
 
 def len_field(c):
     for s in c._fields_:
@@ -40,6 +163,15 @@ class NLStructure(ctypes.Structure):
         pass
 
 
+    @classmethod
+    def from_buffer(cls, buf, offset=0):
+        """ctypes from_buffer() wrapper, which keeps buf for view()
+        """
+        v = from_buffer(cls, buf, offset)
+        v._source = (buf, offset)
+        return v
+
+
     @classmethod
     def csize(cls):
         """ctypes.sizeof() wrapper
@@ -51,7 +183,11 @@ class NLStructure(ctypes.Structure):
     def from_pointer(cls, ptr):
         """casting to this class and returns its contents
         """
-        return ctypes.cast(ptr, ctypes.POINTER(cls)).contents
+        if isinstance(ptr, ctypes.c_void_p):
+            ptr = ptr.value
+        elif not isinstance(ptr, int):
+            ptr = ctypes.cast(ptr, ctypes.c_void_p).value
+        return cls.from_address(ptr)
 
 
     @classmethod
@@ -62,6 +198,38 @@ class NLStructure(ctypes.Structure):
         return cls.__new__(cls, bytearray(data))
 
 
+    def view(self, size=None):
+        """create a memoryview sharing the memory of this instance
+
+        @type size: number
+        @param size: view length, _len field value or sizeof if None
+
+        @rtype: memoryview
+        @return: view which keeps this instance or its buffer alive
+        """
+        if size is None:
+            name = len_field(self)
+            size = name is None and ctypes.sizeof(self) or getattr(self, name)
+
+        # share the buffer this or the outermost struct is created from
+        base, offset = self, 0
+        while base._b_base_ is not None:
+            offset += ctypes.addressof(base) - ctypes.addressof(base._b_base_)
+            base = base._b_base_
+        source = getattr(base, "_source", None)
+        if source is not None:
+            buf, start = source
+            v = memoryview(buf)
+            offset += start
+            if not v.readonly and 0 <= offset and offset + size <= len(v):
+                return v[offset:offset + size]
+
+        # created by from_address() or cast(), as long lived as this
+        a = ubyte_array_at(ctypes.addressof(self), size)
+        a._base = self
+        return memoryview(a)
+
+
     def marshal_binary(self):
         """create a buffer(bytearray) from this instance
         """
@@ -71,7 +239,7 @@ class NLStructure(ctypes.Structure):
             size = getattr(self, name)
 
         # not share, return copy
-        return bytearray(ctypes.cast(ctypes.addressof(self), ctypes.POINTER((ctypes.c_ubyte * size))).contents)
+        return bytearray(ubyte_array_at(ctypes.addressof(self), size))
 
 
     def marshal_bytes(self):
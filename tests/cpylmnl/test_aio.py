@@ -0,0 +1,154 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import unittest, errno, socket, asyncio
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.rtnetlinkh as rtnl
+from cpylmnl import _socket, _nlmsg, _libmnlh, _aio
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.nl = _socket.socket_open(netlink.NETLINK_ROUTE)
+        _socket.socket_bind(self.nl, 0, _libmnlh.MNL_SOCKET_AUTOPID)
+
+    def tearDown(self):
+        _socket.socket_close(self.nl)
+
+    def put_header(self, nlmsg_type, flags=0):
+        buf = bytearray(_libmnlh.MNL_SOCKET_BUFFER_SIZE)
+        nlh = _nlmsg.nlmsg_put_header(buf, netlink.Nlmsghdr)
+        nlh.nlmsg_type = nlmsg_type
+        nlh.nlmsg_flags = netlink.NLM_F_REQUEST | flags
+        return nlh
+
+
+    def test_request(self):
+        async def run():
+            sock = _aio.AsyncSocket(self.nl)
+            nlh = self.put_header(netlink.NLMSG_NOOP)
+            self.assertEqual(await sock.request(nlh), [])
+            self.assertEqual(nlh.nlmsg_seq, sock._seq)
+
+            # no such device
+            nlh = self.put_header(rtnl.RTM_GETLINK)
+            ifm = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Ifinfomsg)
+            ifm.ifi_index = 0x7fffffff
+            try:
+                await sock.request(nlh)
+            except OSError as e:
+                self.assertEqual(e.errno, errno.ENODEV)
+            else:
+                self.fail("not raise OSError")
+        asyncio.run(run())
+
+
+    def test_dump(self):
+        async def run():
+            sock = _aio.AsyncSocket(self.nl)
+            nlh = self.put_header(rtnl.RTM_GETLINK)
+            rt = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Rtgenmsg)
+            rt.rtgen_family = socket.AF_PACKET
+            links = [rh.nlmsg_type async for rh in sock.dump(nlh)]
+            self.assertTrue(len(links) > 0)
+            self.assertEqual(set(links), set([rtnl.RTM_NEWLINK]))
+        asyncio.run(run())
+
+
+    def test_messages(self):
+        async def run():
+            sock = _aio.AsyncSocket(self.nl)
+            # unsolicited message is queued while requesting
+            nlh = self.put_header(netlink.NLMSG_NOOP, netlink.NLM_F_ACK)
+            nlh.nlmsg_seq = 1234
+            _socket.socket_send_nlmsg(self.nl, nlh)
+            await sock.request(self.put_header(netlink.NLMSG_NOOP))
+
+            # and one arrives later
+            nlh.nlmsg_seq = 1235
+            asyncio.get_event_loop().call_later(0.01, _socket.socket_send_nlmsg, self.nl, nlh)
+            seqs = []
+            async for rh in sock.messages():
+                seqs.append(rh.nlmsg_seq)
+                if len(seqs) == 2: break
+            self.assertEqual(seqs, [1234, 1235])
+        asyncio.run(asyncio.wait_for(run(), 5))
+
+
+    def test_concurrent(self):
+        async def run():
+            sock = _aio.AsyncSocket(self.nl)
+            seqs = []
+            async def consume():
+                async for rh in sock.messages():
+                    seqs.append(rh.nlmsg_seq)
+                    if len(seqs) == 2: break
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0)
+
+            # requests while messages() waits on the same socket
+            nlh = self.put_header(netlink.NLMSG_NOOP)
+            self.assertEqual(await sock.request(nlh), [])
+            nlh = self.put_header(rtnl.RTM_GETLINK)
+            rt = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Rtgenmsg)
+            rt.rtgen_family = socket.AF_PACKET
+            self.assertTrue(len([rh async for rh in sock.dump(nlh)]) > 0)
+
+            nlh = self.put_header(netlink.NLMSG_NOOP, netlink.NLM_F_ACK)
+            for seq in (1234, 1235):
+                nlh.nlmsg_seq = seq
+                _socket.socket_send_nlmsg(self.nl, nlh)
+            await task
+            self.assertEqual(seqs, [1234, 1235])
+        asyncio.run(asyncio.wait_for(run(), 5))
+
+
+    def test_dump_closed(self):
+        async def run():
+            sock = _aio.AsyncSocket(self.nl)
+            nlh = self.put_header(rtnl.RTM_GETLINK)
+            rt = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Rtgenmsg)
+            rt.rtgen_family = socket.AF_PACKET
+            dump = sock.dump(nlh)
+            async for rh in dump:
+                break
+            await dump.aclose()
+
+            # the rest of the dump is not yielded as events
+            nlh = self.put_header(netlink.NLMSG_NOOP, netlink.NLM_F_ACK)
+            # kernel puts the next part of the dump as the socket is read
+            seqs = []
+            for seq in (1234, 1235):
+                nlh.nlmsg_seq = seq
+                _socket.socket_send_nlmsg(self.nl, nlh)
+                async for rh in sock.messages():
+                    seqs.append(rh.nlmsg_seq)
+                    break
+            self.assertEqual(seqs, [1234, 1235])
+            self.assertEqual(sock._discard, set())
+        asyncio.run(asyncio.wait_for(run(), 5))
+
+
+    def test_backlog(self):
+        async def run():
+            sock = _aio.AsyncSocket(self.nl, backlog=2)
+            nlh = self.put_header(netlink.NLMSG_NOOP, netlink.NLM_F_ACK)
+            for seq in (1234, 1235, 1236):
+                nlh.nlmsg_seq = seq
+                _socket.socket_send_nlmsg(self.nl, nlh)
+            await sock.request(self.put_header(netlink.NLMSG_NOOP))
+            self.assertEqual(sock.dropped, 1)
+
+            seqs = []
+            async for rh in sock.messages():
+                seqs.append(rh.nlmsg_seq)
+                if len(seqs) == 2: break
+            self.assertEqual(seqs, [1234, 1235])
+        asyncio.run(asyncio.wait_for(run(), 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,7 @@ import ctypes
 
 import cpylmnl.linux.netlinkh as netlink
 import cpylmnl as mnl
+from cpylmnl import _attr, _callback, _libmnlh, _intern
 
 from .linux.netlink.buf import *
 
@@ -693,5 +694,196 @@ class TestSuite(unittest.TestCase):
             self.assertTrue(attr.get_u8() == i * 10)
 
 
+class TestSuiteFunc(unittest.TestCase):
+    """plain attr_ functions
+    """
+    def setUp(self):
+        # three u8 attributes, type 2, 3, 4
+        self.payload = bytearray()
+        for i in range(2, 5):
+            abuf = NlattrBuf(8)
+            abuf.len = 5
+            abuf.type = i
+            abuf[4] = i * 10
+            self.payload += abuf
+
+
+    def test_attr_parse_payload_memoryview(self):
+        @_callback.mnl_attr_cb_t
+        def cb(attr, data):
+            data.append((attr.nla_type, _attr.attr_get_u8(attr)))
+            return _libmnlh.MNL_CB_OK
+
+        buf = bytearray(4) + self.payload
+        l = []
+        self.assertEqual(_attr.attr_parse_payload(memoryview(buf)[4:], cb, l), _libmnlh.MNL_CB_OK)
+        self.assertEqual(l, [(2, 20), (3, 30), (4, 40)])
+
+        # read only
+        l = []
+        v = memoryview(bytes(buf))[4:]
+        self.assertEqual(_attr.attr_parse_payload(v, cb, l), _libmnlh.MNL_CB_OK)
+        self.assertEqual(l, [(2, 20), (3, 30), (4, 40)])
+
+
+    def test_attr_iter_payload(self):
+        l = [(t, bytes(bytearray(v))) for t, v in _attr.attr_iter_payload(memoryview(self.payload))]
+        self.assertEqual(l, [(2, b'\x14'), (3, b'\x1e'), (4, b'(')])
+
+        # stops at invalid nla_len, like mnl_attr_ok()
+        buf = bytearray(self.payload)
+        buf[8] = 200
+        self.assertEqual([t for t, v in _attr.attr_iter_payload(buf)], [2])
+        buf[8] = 3
+        self.assertEqual([t for t, v in _attr.attr_iter_payload(buf)], [2])
+
+
+    def test_attr_iter(self):
+        hbuf = NlmsghdrBuf(bytearray(_libmnlh.MNL_NLMSG_HDRLEN + 4) + self.payload)
+        hbuf.len = len(hbuf)
+        nlh = netlink.Nlmsghdr.from_buffer(hbuf)
+        l = [(t, v) for t, v in _attr.attr_iter(nlh, 4)]
+        self.assertEqual([(t, bytearray(v)[0]) for t, v in l], [(2, 20), (3, 30), (4, 40)])
+        # shares the buffer
+        hbuf[_libmnlh.MNL_NLMSG_HDRLEN + 4 + 4] = 21
+        self.assertEqual(bytearray(l[0][1])[0], 21)
+
+
+    def test_attr_iter_nested(self):
+        abuf = NlattrBuf(bytearray(4) + self.payload)
+        abuf.len = len(abuf)
+        abuf.type = 1 | netlink.NLA_F_NESTED
+        hbuf = NlmsghdrBuf(bytearray(_libmnlh.MNL_NLMSG_HDRLEN) + abuf)
+        hbuf.len = len(hbuf)
+        nlh = netlink.Nlmsghdr.from_buffer(hbuf)
+
+        outer = list(_attr.attr_iter(nlh, 0))
+        self.assertEqual(len(outer), 1)
+        self.assertEqual(outer[0][0], 1)
+        l = [(t, bytearray(v)[0]) for t, v in _attr.attr_iter_nested(outer[0][1])]
+        self.assertEqual(l, [(2, 20), (3, 30), (4, 40)])
+
+        nest = netlink.Nlattr.from_buffer(hbuf, _libmnlh.MNL_NLMSG_HDRLEN)
+        l = [(t, bytearray(v)[0]) for t, v in _attr.attr_iter_nested(nest)]
+        self.assertEqual(l, [(2, 20), (3, 30), (4, 40)])
+
+
+    def test_attr_parse_table(self):
+        hbuf = NlmsghdrBuf(bytearray(_libmnlh.MNL_NLMSG_HDRLEN + 4) + self.payload)
+        hbuf.len = len(hbuf)
+        nlh = netlink.Nlmsghdr.from_buffer(hbuf)
+        start = _libmnlh.MNL_NLMSG_HDRLEN + 4
+
+        tb = _attr.attr_parse_table(nlh, 4, 3)
+        self.assertEqual(tb, [None, None, start, start + 8])
+        attr = netlink.Nlattr.from_buffer(hbuf, tb[3])
+        self.assertEqual(_attr.attr_get_u8(attr), 30)
+
+        # reused, and accepts buffer
+        tb2 = _attr.attr_parse_table(hbuf, 4, 5, tb)
+        self.assertIs(tb2, tb)
+        self.assertEqual(tb, [None, None, start, start + 8, start + 16, None])
+
+        # beyond nlmsg_len
+        hbuf.len = start + 8
+        self.assertEqual(_attr.attr_parse_table(hbuf, 4, 5, tb),
+                         [None, None, start, None, None, None])
+
+        # shrunk to maxtype
+        self.assertEqual(_attr.attr_parse_table(hbuf, 4, 1, tb), [None, None])
+
+
+    def test_attr_parse_table_nested(self):
+        abuf = NlattrBuf(bytearray(4) + self.payload)
+        abuf.len = len(abuf)
+        abuf.type = 1 | netlink.NLA_F_NESTED
+        hbuf = NlmsghdrBuf(bytearray(_libmnlh.MNL_NLMSG_HDRLEN) + abuf + bytearray(8))
+        hbuf.len = len(hbuf)
+        start = _libmnlh.MNL_NLMSG_HDRLEN
+
+        tb = _attr.attr_parse_table(hbuf, 0, 1)
+        self.assertEqual(tb, [None, start])
+        ntb = _attr.attr_parse_table_nested(hbuf, tb[1], 4)
+        self.assertEqual(ntb, [None, None, start + 4, start + 12, start + 20])
+
+
+    def test_attr_get_be(self):
+        abuf = NlattrBuf(12)
+        abuf.len = 12
+        abuf.type = 1
+        abuf[4:12] = b"\x01\x02\x03\x04\x05\x06\x07\x08"
+        attr = netlink.Nlattr.from_buffer(abuf)
+        self.assertEqual(_attr.attr_get_be16(attr), 0x0102)
+        self.assertEqual(_attr.attr_get_be32(attr), 0x01020304)
+        self.assertEqual(_attr.attr_get_be64(attr), 0x0102030405060708)
+
+        self.assertEqual(_attr.attr_get_u16_auto(attr), _attr.attr_get_u16(attr))
+        self.assertEqual(_attr.attr_get_u32_auto(attr), _attr.attr_get_u32(attr))
+        self.assertEqual(_attr.attr_get_u64_auto(attr), _attr.attr_get_u64(attr))
+        abuf.type = 1 | netlink.NLA_F_NET_BYTEORDER
+        self.assertEqual(_attr.attr_get_u16_auto(attr), 0x0102)
+        self.assertEqual(_attr.attr_get_u32_auto(attr), 0x01020304)
+        self.assertEqual(_attr.attr_get_u64_auto(attr), 0x0102030405060708)
+
+
+    def test_attr_get_many(self):
+        payload = bytearray()
+        for i in range(1, 4):
+            abuf = NlattrBuf(12)
+            abuf.len = 12
+            abuf.type = i
+            abuf[4:12] = struct.pack(">Q", i * 1000)
+            payload += abuf
+        hbuf = NlmsghdrBuf(bytearray(_libmnlh.MNL_NLMSG_HDRLEN) + payload)
+        hbuf.len = len(hbuf)
+        nlh = netlink.Nlmsghdr.from_buffer(hbuf)
+
+        tb = _attr.attr_parse_table(nlh, 0, 4)
+        self.assertEqual(_attr.attr_get_be64_many(nlh, tb), [None, 1000, 2000, 3000, None])
+        self.assertEqual(_attr.attr_get_be64_many(hbuf, tb[1:2]), [1000])
+        self.assertEqual(_attr.attr_get_u64_many(hbuf, tb[1:2]),
+                         [struct.unpack("=Q", struct.pack(">Q", 1000))[0]])
+        self.assertEqual(_attr.attr_get_be32_many(hbuf, tb[1:2]), [0])
+        self.assertEqual(_attr.attr_get_be16_many(hbuf, []), [])
+
+
+    def test_attr_get_addr(self):
+        abuf = NlattrBuf(20)
+        abuf.len = 8
+        abuf.type = 1
+        abuf[4:8] = b"\xc0\x00\x02\x01"
+        attr = netlink.Nlattr.from_buffer(abuf)
+        self.assertEqual(_attr.attr_get_in_addr(attr), "192.0.2.1")
+        abuf.len = 10
+        abuf[4:10] = b"\x00\x00\x5e\x00\x53\x01"
+        self.assertEqual(_attr.attr_get_lladdr(attr), "00:00:5e:00:53:01")
+        self.assertRaises(OSError, _attr.attr_get_in6_addr, attr)
+        abuf.len = 20
+        abuf[4:20] = b"\x20\x01\x0d\xb8" + b"\0" * 11 + b"\x01"
+        self.assertEqual(_attr.attr_get_in6_addr(attr), "2001:db8::1")
+
+        t = _intern.InternTable()
+        a = _attr.attr_get_in6_addr(attr, t)
+        self.assertIs(_attr.attr_get_in6_addr(attr, t), a)
+        self.assertEqual((t.hits, t.misses), (1, 1))
+
+
+    def test_attr_get_str_intern(self):
+        abuf = NlattrBuf(12)
+        abuf.len = 10
+        abuf.type = 1
+        abuf[4:10] = b"eth0\0\0"
+        attr = netlink.Nlattr.from_buffer(abuf)
+        self.assertEqual(_attr.attr_get_str(attr), b"eth0")
+
+        t = _intern.InternTable()
+        s = _attr.attr_get_str(attr, t)
+        self.assertEqual(s, b"eth0")
+        abuf2 = NlattrBuf(abuf)
+        attr2 = netlink.Nlattr.from_buffer(abuf2)
+        self.assertIs(_attr.attr_get_str(attr2, t), s)
+        self.assertEqual(t.hit_rate(), 0.5)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,162 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import unittest, errno, socket
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.rtnetlinkh as rtnl
+import cpylmnl.linux.netfilter.nfnetlinkh as nfnl
+from cpylmnl import _socket, _nlmsg, _libmnlh, _batch
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.nl = _socket.socket_open(netlink.NETLINK_ROUTE)
+        _socket.socket_bind(self.nl, 0, _libmnlh.MNL_SOCKET_AUTOPID)
+
+    def tearDown(self):
+        _socket.socket_close(self.nl)
+
+
+    def test_noop(self):
+        sends = []
+        sendto = _socket.socket_sendto
+        def counting_sendto(nl, buf):
+            sends.append(len(buf))
+            self.assertTrue(b.inflight() <= 16)
+            return sendto(nl, buf)
+
+        _socket.socket_sendto = counting_sendto
+        try:
+            with _batch.BatchSender(self.nl, window=16, limit=256) as b:
+                seqs = []
+                for i in range(100):
+                    b.builder().put_header(netlink.NLMSG_NOOP, netlink.NLM_F_REQUEST)
+                    seqs.append(b.add())
+        finally:
+            _socket.socket_sendto = sendto
+        self.assertEqual(len(set(seqs)), 100)
+        self.assertEqual(b.sent, 100)
+        self.assertEqual(b.acked, 100)
+        self.assertEqual(b.errors, {})
+        self.assertEqual(b.inflight(), 0)
+        # 16 headers of 16 bytes in a batch of 256
+        self.assertEqual(sends, [256] * 6 + [64])
+
+
+    def test_window(self):
+        sends = []
+        sendto = _socket.socket_sendto
+        def counting_sendto(nl, buf):
+            sends.append(len(buf))
+            return sendto(nl, buf)
+
+        _socket.socket_sendto = counting_sendto
+        try:
+            with _batch.BatchSender(self.nl, window=4, limit=256) as b:
+                for i in range(50):
+                    b.builder().put_header(netlink.NLMSG_NOOP, netlink.NLM_F_REQUEST)
+                    b.add()
+                    self.assertTrue(b.inflight() <= 4)
+        finally:
+            _socket.socket_sendto = sendto
+        self.assertEqual(b.acked, 50)
+        # a batch holds window requests, not limit
+        self.assertEqual(sends, [64] * 12 + [32])
+
+
+    def test_errors(self):
+        b = _batch.BatchSender(self.nl, window=4)
+        seqs = []
+        for i in range(10):
+            nlh = _nlmsg.nlmsg_put_header(b.current(), netlink.Nlmsghdr)
+            nlh.nlmsg_type = rtnl.RTM_GETLINK
+            nlh.nlmsg_flags = netlink.NLM_F_REQUEST
+            ifm = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Ifinfomsg)
+            ifm.ifi_index = i % 2 and 0x7fffffff or 1
+            del nlh, ifm
+            seqs.append(b.add())
+        errors = b.flush()
+        b.close()
+        self.assertEqual(errors, dict((seq, errno.ENODEV) for seq in seqs[1::2]))
+        self.assertEqual(b.acked, 5)
+        self.assertEqual(b.unmatched, 0)
+
+
+# linux/netfilter/nf_tables.h
+NFT_MSG_NEWTABLE	= 0
+NFT_MSG_DELTABLE	= 2
+NFTA_TABLE_NAME		= 1
+
+class TestNfnlBatch(unittest.TestCase):
+    def setUp(self):
+        self.nl = _socket.socket_open(netlink.NETLINK_NETFILTER)
+        _socket.socket_bind(self.nl, 0, _libmnlh.MNL_SOCKET_AUTOPID)
+
+    def tearDown(self):
+        _socket.socket_close(self.nl)
+
+
+    def add_table(self, b, msg_type, name, subsys=nfnl.NFNL_SUBSYS_NFTABLES):
+        mb = b.builder().put_header((subsys << 8) | msg_type, netlink.NLM_F_REQUEST)
+        mb.put_extra_header_as(nfnl.Nfgenmsg).nfgen_family = socket.AF_INET
+        mb.put_strz(NFTA_TABLE_NAME, name)
+        return b.add()
+
+
+    def test_commit(self):
+        with _batch.NfnlBatch(self.nl, nfnl.NFNL_SUBSYS_NFTABLES) as b:
+            self.add_table(b, NFT_MSG_NEWTABLE, b"cpylmnl_test")
+            self.add_table(b, NFT_MSG_DELTABLE, b"cpylmnl_test")
+        self.assertEqual(b.errors, {})
+        self.assertEqual(b.acked, 2)
+
+
+    def test_abort(self):
+        sends = []
+        sendto = _socket.socket_sendto
+        def counting_sendto(nl, buf):
+            sends.append(len(buf))
+            return sendto(nl, buf)
+
+        _socket.socket_sendto = counting_sendto
+        try:
+            b = _batch.NfnlBatch(self.nl, nfnl.NFNL_SUBSYS_NFTABLES)
+            seqs = [self.add_table(b, NFT_MSG_NEWTABLE, b"cpylmnl_test"),
+                    self.add_table(b, NFT_MSG_DELTABLE, b"cpylmnl_nosuch"),
+                    self.add_table(b, NFT_MSG_NEWTABLE, b"cpylmnl_test2")]
+            self.assertEqual(b.flush(), {seqs[0]: _batch.ECANCELED,
+                                         seqs[1]: errno.ENOENT,
+                                         seqs[2]: _batch.ECANCELED})
+        finally:
+            _socket.socket_sendto = sendto
+        self.assertEqual(len(sends), 1)
+        self.assertEqual(b.acked, 0)
+        self.assertEqual(b.aborts, 1)
+
+        # the table created above has not been committed
+        seq = self.add_table(b, NFT_MSG_DELTABLE, b"cpylmnl_test")
+        self.assertEqual(b.flush()[seq], errno.ENOENT)
+        b.close()
+
+
+    def test_not_supported(self):
+        with _batch.NfnlBatch(self.nl, nfnl.NFNL_SUBSYS_CTNETLINK) as b:
+            seqs = [self.add_table(b, 0, b"x", nfnl.NFNL_SUBSYS_CTNETLINK) for i in range(3)]
+        self.assertEqual(b.errors, dict((seq, errno.EOPNOTSUPP) for seq in seqs))
+        self.assertEqual(b.inflight(), 0)
+
+
+    def test_nospc(self):
+        b = _batch.NfnlBatch(self.nl, nfnl.NFNL_SUBSYS_NFTABLES, limit=128)
+        self.add_table(b, NFT_MSG_NEWTABLE, b"cpylmnl_test")
+        self.assertRaises(OSError, self.add_table, b, NFT_MSG_DELTABLE, b"x" * 64)
+        self.add_table(b, NFT_MSG_DELTABLE, b"cpylmnl_test")
+        self.assertEqual(b.flush(), {})
+        b.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
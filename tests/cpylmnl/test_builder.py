@@ -0,0 +1,141 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import sys, random, unittest, errno, socket
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.netfilter.nfnetlinkh as nfnl
+import cpylmnl.linux.netfilter.nfnetlink_conntrackh as nfnlct
+from cpylmnl import _attr, _nlmsg, _libmnlh, _builder
+
+
+class TestSuite(unittest.TestCase):
+    # compare with libmnl in zeroed buffers, old libmnl leaves attribute padding
+    def setUp(self):
+        self.mbuf = bytearray(512)
+        self.pbuf = bytearray(512)
+
+
+    def assertSameBuf(self):
+        self.assertEqual(self.mbuf, self.pbuf)
+
+
+    def test_header(self):
+        nlh = _nlmsg.nlmsg_put_header(self.mbuf, netlink.Nlmsghdr)
+        nlh.nlmsg_type = 0x1234
+        nlh.nlmsg_flags = netlink.NLM_F_REQUEST | netlink.NLM_F_ACK
+        nlh.nlmsg_seq = 0x89abcdef
+        nfg = _nlmsg.nlmsg_put_extra_header_as(nlh, nfnl.Nfgenmsg)
+        nfg.nfgen_family = socket.AF_INET
+        nfg.res_id = 0x0102
+
+        b = _builder.NlmsgBuilder(self.pbuf)
+        b.put_header(0x1234, netlink.NLM_F_REQUEST | netlink.NLM_F_ACK, 0x89abcdef)
+        pfg = b.put_extra_header_as(nfnl.Nfgenmsg)
+        pfg.nfgen_family = socket.AF_INET
+        pfg.res_id = 0x0102
+        self.assertSameBuf()
+        self.assertEqual(b.nlmsghdr().nlmsg_len, nlh.nlmsg_len)
+
+
+    def test_attrs(self):
+        nlh = _nlmsg.nlmsg_put_header(self.mbuf, netlink.Nlmsghdr)
+        b = _builder.NlmsgBuilder(self.pbuf).put_header()
+        rand = random.Random(0x6d6e6c)
+        for i in range(64):
+            attr_type = rand.randrange(1, 0x3fff)
+            n = rand.randrange(5)
+            if n == 0:
+                v = rand.randrange(0x100)
+                _attr.attr_put_u8(nlh, attr_type, v)
+                b.put_u8(attr_type, v)
+            elif n == 1:
+                v = rand.randrange(0x10000)
+                _attr.attr_put_u16(nlh, attr_type, v)
+                b.put_u16(attr_type, v)
+            elif n == 2:
+                v = rand.randrange(0x100000000)
+                _attr.attr_put_u32(nlh, attr_type, v)
+                b.put_u32(attr_type, v)
+            elif n == 3:
+                v = rand.randrange(0x10000000000000000)
+                _attr.attr_put_u64(nlh, attr_type, v)
+                b.put_u64(attr_type, v)
+            else:
+                v = bytes(bytearray(rand.randrange(1, 0x100) for j in range(rand.randrange(16))))
+                if rand.randrange(2):
+                    _attr.attr_put_str(nlh, attr_type, v)
+                    b.put_str(attr_type, v)
+                else:
+                    _attr.attr_put_strz(nlh, attr_type, v)
+                    b.put_strz(attr_type, v)
+            if nlh.nlmsg_len > 400: break
+        self.assertSameBuf()
+
+
+    def test_nest(self):
+        nlh = _nlmsg.nlmsg_put_header(self.mbuf, netlink.Nlmsghdr)
+        _nlmsg.nlmsg_put_extra_header_as(nlh, nfnl.Nfgenmsg)
+        nest1 = _attr.attr_nest_start(nlh, nfnlct.CTA_TUPLE_ORIG)
+        nest2 = _attr.attr_nest_start(nlh, nfnlct.CTA_TUPLE_IP)
+        _attr.attr_put_u32(nlh, nfnlct.CTA_IP_V4_SRC, 0x0100007f)
+        _attr.attr_nest_end(nlh, nest2)
+        nest2 = _attr.attr_nest_start(nlh, nfnlct.CTA_TUPLE_PROTO)
+        _attr.attr_put_u8(nlh, nfnlct.CTA_PROTO_NUM, socket.IPPROTO_TCP)
+        _attr.attr_nest_cancel(nlh, nest2)
+        _attr.attr_nest_end(nlh, nest1)
+        _attr.attr_put_u32(nlh, nfnlct.CTA_MARK, 7)
+
+        b = _builder.NlmsgBuilder(self.pbuf).put_header()
+        b.put_extra_header(nfnl.Nfgenmsg.csize())
+        n1 = b.nest_start(nfnlct.CTA_TUPLE_ORIG)
+        n2 = b.nest_start(nfnlct.CTA_TUPLE_IP)
+        b.put_u32(nfnlct.CTA_IP_V4_SRC, 0x0100007f)
+        b.nest_end(n2)
+        n2 = b.nest_start(nfnlct.CTA_TUPLE_PROTO)
+        b.put_u8(nfnlct.CTA_PROTO_NUM, socket.IPPROTO_TCP)
+        b.nest_cancel(n2)
+        b.nest_end(n1)
+        b.put_u32(nfnlct.CTA_MARK, 7)
+        # libmnl leaves the canceled nest as is, only nlmsg_len matters
+        self.assertEqual(self.mbuf[:nlh.nlmsg_len], self.pbuf[:b.nlmsg_len])
+
+
+    def test_check(self):
+        # u64 is aligned, fails at the same put as mnl_attr_put_*_check()
+        buflen = 64
+        nlh = _nlmsg.nlmsg_put_header(self.mbuf, netlink.Nlmsghdr)
+        b = _builder.NlmsgBuilder(memoryview(self.pbuf)[:buflen]).put_header()
+        for i in range(16):
+            ok = _attr.attr_put_u64_check(nlh, buflen, 1, i)
+            try:
+                b.put_u64(1, i)
+            except OSError as e:
+                self.assertEqual(e.errno, errno.ENOSPC)
+                self.assertFalse(ok)
+                break
+            self.assertTrue(ok)
+        self.assertEqual(self.mbuf[:buflen], self.pbuf[:buflen])
+        self.assertTrue(_attr.attr_nest_start_check(nlh, buflen, 2) is None)
+        self.assertRaises(OSError, b.nest_start, 2)
+        self.assertRaises(OSError, b.put_strz, 1, b"")
+        self.assertEqual(b.nlmsg_len, nlh.nlmsg_len)
+
+        # stricter, the padding has to fit
+        buflen = _libmnlh.MNL_NLMSG_HDRLEN + _libmnlh.MNL_ATTR_HDRLEN + 1
+        b = _builder.NlmsgBuilder(memoryview(self.pbuf)[:buflen]).put_header()
+        self.assertRaises(OSError, b.put_u8, 1, 1)
+        self.assertEqual(b.nlmsg_len, _libmnlh.MNL_NLMSG_HDRLEN)
+
+
+    def test_offset(self):
+        b = _builder.NlmsgBuilder(self.pbuf).put_header(1).put_u8(1, 1)
+        b2 = _builder.NlmsgBuilder(self.pbuf, b.end()).put_header(2).put_strz(1, b"abc")
+        l = [(nlh.nlmsg_type, nlh.nlmsg_len) for nlh in _nlmsg.nlmsg_iter(memoryview(self.pbuf)[:b2.end()])]
+        self.assertEqual(l, [(1, 24), (2, 24)])
+
+
+if __name__ == '__main__':
+    unittest.main()
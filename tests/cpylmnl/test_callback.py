@@ -8,6 +8,7 @@ from ctypes import set_errno
 
 import cpylmnl.linux.netlinkh as netlink
 import cpylmnl as mnl
+from cpylmnl import _callback, _libmnlh, _cproto
 
 from .linux.netlink.buf import *
 
@@ -264,5 +265,117 @@ class TestSuite(unittest.TestCase):
                 self.fail("not raise OSError")
 
 
+    def test_cb_run_memoryview(self):
+        @_callback.mnl_cb_t
+        def cb_data(h, d):
+            d.append(h.nlmsg_type)
+            return _libmnlh.MNL_CB_OK
+
+        buf = bytearray(16) + self.nlmsghdr_type7F
+        l = []
+        self.assertEqual(_callback.cb_run(memoryview(buf)[16:], 1, 1, cb_data, l), _libmnlh.MNL_CB_OK)
+        self.assertEqual(l, [netlink.NLMSG_MIN_TYPE, 0x7f])
+
+        l = []
+        self.assertEqual(_callback.cb_run2(memoryview(buf)[16:], 1, 1, cb_data, l), _libmnlh.MNL_CB_OK)
+        self.assertEqual(l, [netlink.NLMSG_MIN_TYPE, 0x7f])
+
+        # read only buffer
+        l = []
+        self.assertEqual(_callback.cb_run(bytes(self.nlmsghdr_type7F), 1, 1, cb_data, l), _libmnlh.MNL_CB_OK)
+        self.assertEqual(l, [netlink.NLMSG_MIN_TYPE, 0x7f])
+        self.assertEqual(_callback.cb_run(bytearray(), 1, 1, cb_data, l), _libmnlh.MNL_CB_OK)
+
+        # read only memoryview is copied by its contents
+        for run in (_callback.cb_run, _callback.cb_run2):
+            l = []
+            v = memoryview(bytes(buf))[16:]
+            self.assertEqual(run(v, 1, 1, cb_data, l), _libmnlh.MNL_CB_OK)
+            self.assertEqual(l, [netlink.NLMSG_MIN_TYPE, 0x7f])
+
+
+    def test_cb_run_py_null(self):
+        # NULL handler is skipped, same as C
+        null = _cproto.MNL_CB_T()
+        for run, crun in ((_callback.cb_run_py, _callback.cb_run),
+                          (_callback.cb_run2_py, _callback.cb_run2)):
+            self.assertEqual(run(self.nlmsghdr_mintype, 1, 1, null, None),
+                             crun(self.nlmsghdr_mintype, 1, 1, null, None))
+        ctls = {netlink.NLMSG_ERROR: null, netlink.NLMSG_DONE: null}
+        for buf in (self.nlmsghdr_error, self.nlmsghdr_done):
+            self.assertEqual(_callback.cb_run2_py(buf, 1, 1, None, None, ctls),
+                             _callback.cb_run2(buf, 1, 1, None, None, ctls))
+
+
+    def test_cb_run_py(self):
+        for run in (_callback.cb_run_py, _callback.cb_run2_py):
+            self.assertEqual(run(self.nlmsghdr_noop, 1, 1, None, None), _libmnlh.MNL_CB_OK)
+            self.assertEqual(run(self.nlmsghdr_mintype, 1, 1, None, None), _libmnlh.MNL_CB_OK)
+            self.assertEqual(run(self.nlmsghdr_done, 1, 1, None, None), _libmnlh.MNL_CB_STOP)
+            self.assertEqual(run(self.nlmsghdr_overrun, 1, 1, None, None), _libmnlh.MNL_CB_OK)
+            try:
+                run(self.nlmsghdr_error, 1, 1, None, None)
+            except OSError as e:
+                self.assertEqual(e.errno, errno.EPERM)
+            else:
+                self.fail("not raise OSError")
+
+            @_callback.mnl_cb_t
+            def cb_data(h, d):
+                d is not None and d.append(h.nlmsg_type)
+                if h.nlmsg_type == 0xff:
+                    ctypes.set_errno(errno.ENOBUFS)
+                    return _libmnlh.MNL_CB_ERROR
+                elif h.nlmsg_type == 0x7f: return _libmnlh.MNL_CB_STOP
+                else: return _libmnlh.MNL_CB_OK
+
+            l = []
+            try:
+                run(self.nlmsghdr_typeFF, 1, 1, cb_data, l)
+            except OSError as e:
+                self.assertEqual(e.errno, errno.ENOBUFS)
+            else:
+                self.fail("not raise OSError")
+            self.assertEqual(l, [netlink.NLMSG_MIN_TYPE, 0xff])
+
+            l = []
+            self.assertEqual(run(self.nlmsghdr_type7F + self.nlmsghdr_noop, 1, 1, cb_data, l),
+                             _libmnlh.MNL_CB_STOP)
+            self.assertEqual(l, [netlink.NLMSG_MIN_TYPE, 0x7f])
+
+            # read only, plain Python function
+            l = []
+            self.assertEqual(run(bytes(self.nlmsghdr_mintype), 0, 0, lambda h, d: d.append(h.nlmsg_seq) or 1, l),
+                             _libmnlh.MNL_CB_OK)
+            self.assertEqual(l, [1])
+
+            for buf, en in ((self.nlmsghdr_pid2, errno.ESRCH),
+                            (self.nlmsghdr_seq2, errno.EPROTO),
+                            (self.nlmsghdr_intr, errno.EINTR)):
+                try:
+                    run(buf, 1, 1, cb_data, None)
+                except OSError as e:
+                    self.assertEqual(e.errno, en)
+                else:
+                    self.fail("not raise OSError")
+
+        # with ctl cb
+        @_callback.mnl_cb_t
+        def cb_ctl(h, d):
+            d.append(h.nlmsg_type)
+            return _libmnlh.MNL_CB_OK
+
+        l = []
+        cb_ctls = {netlink.NLMSG_ERROR: cb_ctl}
+        self.assertEqual(_callback.cb_run2_py(self.nlmsghdr_error + self.nlmsghdr_done, 1, 1, None, l, cb_ctls),
+                         _libmnlh.MNL_CB_OK)
+        self.assertEqual(l, [netlink.NLMSG_ERROR])
+        # compare with libmnl
+        l = []
+        self.assertEqual(_callback.cb_run2(self.nlmsghdr_error + self.nlmsghdr_done, 1, 1, None, l, cb_ctls),
+                         _libmnlh.MNL_CB_OK)
+        self.assertEqual(l, [netlink.NLMSG_ERROR])
+
+
 if __name__ == '__main__':
     unittest.main()
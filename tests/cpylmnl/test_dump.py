@@ -0,0 +1,88 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import unittest, errno, socket, select
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.rtnetlinkh as rtnl
+from cpylmnl import _socket, _nlmsg, _libmnlh, _dump
+
+from .linux.netlink.buf import *
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.nl = _socket.socket_open(netlink.NETLINK_ROUTE)
+        _socket.socket_bind(self.nl, 0, _libmnlh.MNL_SOCKET_AUTOPID)
+
+    def tearDown(self):
+        _socket.socket_close(self.nl)
+
+    def getlink(self, seq):
+        buf = bytearray(_libmnlh.MNL_SOCKET_BUFFER_SIZE)
+        nlh = _nlmsg.nlmsg_put_header(buf, netlink.Nlmsghdr)
+        nlh.nlmsg_type = rtnl.RTM_GETLINK
+        nlh.nlmsg_flags = netlink.NLM_F_REQUEST
+        nlh.nlmsg_seq = seq
+        rt = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Rtgenmsg)
+        rt.rtgen_family = socket.AF_PACKET
+        return nlh
+
+    def inject_intr(self, seq):
+        # pretend an interrupted dump message from another socket
+        hbuf = NlmsghdrBuf(16)
+        hbuf.len = 16
+        hbuf.type = rtnl.RTM_NEWLINK
+        hbuf.flags = netlink.NLM_F_MULTI | netlink.NLM_F_DUMP_INTR
+        hbuf.seq = seq
+        s = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, netlink.NETLINK_ROUTE)
+        try:
+            s.sendto(hbuf, (_socket.socket_get_portid(self.nl), 0))
+        except socket.error as e:
+            s.close()
+            self.skipTest("could not send to user socket: %s" % e)
+        s.close()
+
+
+    def test_dump(self):
+        d = _dump.Dump(self.nl, self.getlink(0))
+        self.assertTrue(d.nlh.nlmsg_seq != 0)
+        links = [nlh.nlmsg_type for nlh in d]
+        self.assertTrue(len(links) > 0)
+        self.assertEqual(set(links), set([rtnl.RTM_NEWLINK]))
+        self.assertEqual(d.restarts, 0)
+
+
+    def test_intr(self):
+        self.inject_intr(1234)
+        try:
+            list(_dump.Dump(self.nl, self.getlink(1234)))
+        except OSError as e:
+            self.assertEqual(e.errno, errno.EINTR)
+        else:
+            self.fail("not raise OSError")
+        # the rest of the dump has been drained
+        fd = _socket.socket_get_fd(self.nl)
+        self.assertEqual(select.select([fd], [], [], 0)[0], [])
+
+
+    def test_restart(self):
+        nlinks = len(list(_dump.Dump(self.nl, self.getlink(0))))
+
+        restarted = []
+        self.inject_intr(1234)
+        d = _dump.Dump(self.nl, self.getlink(1234), restart=True,
+                       on_restart=lambda: restarted.append(len(links)))
+        links = []
+        for nlh in d:
+            links.append(nlh)
+        self.assertEqual(d.restarts, 1)
+        self.assertEqual(d.nlh.nlmsg_seq, 1235)
+        self.assertEqual(restarted, [0])
+        self.assertEqual(len(links), nlinks)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import sys, unittest
+
+from cpylmnl import _intern
+
+
+class TestSuite(unittest.TestCase):
+    def test_get(self):
+        calls = []
+        def decode(b):
+            calls.append(b)
+            return b.decode("ascii").upper()
+
+        t = _intern.InternTable(maxsize=2)
+        self.assertEqual(t.hit_rate(), 0.0)
+        v = t.get(b"eth0", decode)
+        self.assertEqual(v, "ETH0")
+        self.assertIs(t.get(b"eth0", decode), v)
+        self.assertEqual(calls, [b"eth0"])
+        self.assertEqual((t.hits, t.misses, t.evictions), (1, 1, 0))
+        self.assertEqual(t.hit_rate(), 0.5)
+
+        t.get(b"eth1", decode)
+        t.get(b"eth2", decode) # evicts the oldest, eth0
+        self.assertEqual(len(t), 2)
+        self.assertFalse(b"eth0" in t)
+        self.assertTrue(b"eth2" in t)
+        self.assertEqual(t.evictions, 1)
+
+        # a hit keeps eth1, eth2 is the least recently used
+        t.get(b"eth1", decode)
+        t.get(b"eth3", decode)
+        self.assertTrue(b"eth1" in t)
+        self.assertFalse(b"eth2" in t)
+
+        t.clear()
+        self.assertEqual(len(t), 0)
+        self.assertEqual(t.misses, 4)
+
+        # nothing is kept
+        t = _intern.InternTable(maxsize=0)
+        self.assertEqual(t.get(b"eth0", decode), "ETH0")
+        self.assertEqual(t.get(b"eth0", decode), "ETH0")
+        self.assertEqual(len(t), 0)
+        self.assertEqual((t.hits, t.misses, t.evictions), (0, 2, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
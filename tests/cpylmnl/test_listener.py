@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import unittest, errno, socket, struct, select
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.rtnetlinkh as rtnl
+from cpylmnl import _socket, _callback, _libmnlh, _listener
+
+from .linux.netlink.buf import *
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.nl = _socket.socket_open(netlink.NETLINK_ROUTE)
+        _socket.socket_bind(self.nl, rtnl.RTMGRP_LINK, _libmnlh.MNL_SOCKET_AUTOPID)
+
+    def tearDown(self):
+        _socket.socket_close(self.nl)
+
+    def broadcast(self, n):
+        # pretend link events by another socket
+        hbuf = NlmsghdrBuf(1024)
+        hbuf.len = 1024
+        hbuf.type = rtnl.RTM_NEWLINK
+        s = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, netlink.NETLINK_ROUTE)
+        try:
+            for i in range(n):
+                hbuf.seq = i
+                s.sendto(hbuf, (0, rtnl.RTMGRP_LINK))
+        except socket.error as e:
+            self.skipTest("could not send to multicast group: %s" % e)
+        finally:
+            s.close()
+
+
+    def test_overrun(self):
+        @_callback.mnl_cb_t
+        def cb(nlh, data):
+            data.append(nlh.nlmsg_seq)
+            return _libmnlh.MNL_CB_OK
+
+        events = []
+        resynced = []
+        l = _listener.Listener(self.nl, cb, events, resync=lambda: resynced.append(len(events)),
+                               rcvbuf=4096)
+        self.broadcast(256)
+        while l.overruns == 0:
+            l.process()
+        self.assertEqual(l.resyncs, 1)
+        self.assertEqual(resynced, [0])
+
+        # listen again
+        self.broadcast(1)
+        l.process()
+        self.assertEqual(events[-1], 0)
+
+
+    def test_resync_events(self):
+        @_callback.mnl_cb_t
+        def cb(nlh, data):
+            data.append(nlh.nlmsg_seq)
+            return _libmnlh.MNL_CB_OK
+
+        events = []
+        def resync():
+            # events while dumping
+            self.broadcast(2)
+        l = _listener.Listener(self.nl, cb, events, resync=resync, rcvbuf=4096)
+        self.broadcast(256)
+        while l.overruns == 0:
+            l.process()
+        del events[:]
+        self.assertEqual(l.resyncs, 1)
+        self.assertTrue(l.dropped > 0)
+        self.assertEqual(l.buffered, 2)
+
+        # queued in userspace, not in the socket
+        self.assertEqual(select.select([_socket.socket_get_fd(self.nl)], [], [], 0)[0], [])
+        l.process()
+        l.process()
+        self.assertEqual(events, [0, 1])
+
+
+    def test_rcvbuf(self):
+        _socket.socket_set_rcvbuf(self.nl, 1 << 20)
+        sock = socket.fromfd(_socket.socket_get_fd(self.nl), socket.AF_NETLINK, socket.SOCK_RAW)
+        self.assertEqual(sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF), 2 << 20)
+        sock.close()
+
+        l = _listener.Listener(self.nl, None, no_enobufs=True)
+        self.assertEqual(struct.unpack("i", _socket.socket_getsockopt(self.nl, netlink.NETLINK_NO_ENOBUFS, 4))[0], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import unittest, errno
+
+import cpylmnl.linux.netlinkh as netlink
+from cpylmnl import _socket, _nlmsg, _callback, _libmnlh, _mux
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.nls = []
+        for i in range(3):
+            nl = _socket.socket_open(netlink.NETLINK_ROUTE)
+            _socket.socket_bind(nl, 0, _libmnlh.MNL_SOCKET_AUTOPID)
+            self.nls.append(nl)
+        self.mux = _mux.SocketMux()
+
+    def tearDown(self):
+        self.mux.close()
+        for nl in self.nls:
+            _socket.socket_close(nl)
+
+    def send_noop(self, nl, seq, flags=netlink.NLM_F_ACK):
+        buf = bytearray(_libmnlh.MNL_NLMSG_HDRLEN)
+        nlh = _nlmsg.nlmsg_put_header(buf, netlink.Nlmsghdr)
+        nlh.nlmsg_type = netlink.NLMSG_NOOP
+        nlh.nlmsg_flags = netlink.NLM_F_REQUEST | flags
+        nlh.nlmsg_seq = seq
+        _socket.socket_sendto(nl, buf)
+
+
+    def test_poll(self):
+        @_callback.mnl_cb_t
+        def cb_err(nlh, data):
+            data.append(nlh.nlmsg_seq)
+            return _libmnlh.MNL_CB_OK
+
+        received = [[] for nl in self.nls]
+        for nl, l in zip(self.nls, received):
+            self.mux.register(nl, None, l, cb_ctls={netlink.NLMSG_ERROR: cb_err})
+        self.assertEqual(len(self.mux), 3)
+        self.assertEqual(self.mux.poll(0), 0)
+
+        for i in range(4):
+            self.send_noop(self.nls[0], 10 + i)
+        self.send_noop(self.nls[2], 30)
+        self.assertEqual(self.mux.poll(1), 5)
+        self.assertEqual(received, [[10, 11, 12, 13], [], [30]])
+
+        st = self.mux.stats(self.nls[0])
+        self.assertEqual((st.wakeups, st.datagrams, st.bytes, st.max_drain, st.errors),
+                         (1, 4, 36 * 4, 4, 0))
+        self.assertEqual(self.mux.stats(self.nls[1]).wakeups, 0)
+
+        self.mux.unregister(self.nls[2])
+        self.send_noop(self.nls[2], 31)
+        self.assertEqual(self.mux.poll(0), 0)
+
+
+    def test_error(self):
+        errors = []
+        self.mux.register(self.nls[0], None, errback=lambda nl, e: errors.append(e.errno))
+        self.mux.register(self.nls[1], None, portid=1)
+
+        # not expected seq
+        self.mux.register(self.nls[2], None, seq=1)
+        self.send_noop(self.nls[2], 2)
+        try:
+            self.mux.poll(1)
+        except OSError as e:
+            self.assertEqual(e.errno, errno.EPROTO)
+        else:
+            self.fail("not raise OSError")
+        self.assertEqual(self.mux.stats(self.nls[2]).errors, 1)
+
+        # errback, by default control callback
+        buf = bytearray(_libmnlh.MNL_NLMSG_HDRLEN)
+        nlh = _nlmsg.nlmsg_put_header(buf, netlink.Nlmsghdr)
+        nlh.nlmsg_type = 0xffff # unknown
+        nlh.nlmsg_flags = netlink.NLM_F_REQUEST
+        _socket.socket_sendto(self.nls[0], buf)
+        self.mux.poll(1)
+        self.assertEqual(errors, [errno.EOPNOTSUPP])
+        self.assertEqual(self.mux.stats(self.nls[0]).last_error.errno, errno.EOPNOTSUPP)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,7 @@ import ctypes
 
 import cpylmnl.linux.netlinkh as netlink
 import cpylmnl as mnl
+from cpylmnl import _nlmsg
 import cpylmnl.linux.netfilter.nfnetlinkh as nfnl # for _as() casting
 
 from .linux.netlink.buf import *
@@ -257,5 +258,22 @@ class TestSuite(unittest.TestCase):
         b.stop()
 
 
+class TestSuiteFunc(unittest.TestCase):
+    """plain nlmsg_ functions
+    """
+    def test_nlmsg_iter(self):
+        buf = bytearray()
+        for i in range(3):
+            hbuf = NlmsghdrBuf(20)
+            hbuf.len = 17 # aligned to 20
+            hbuf.seq = i
+            buf += hbuf
+        self.assertEqual([nlh.nlmsg_seq for nlh in _nlmsg.nlmsg_iter(buf)], [0, 1, 2])
+        self.assertEqual([nlh.nlmsg_seq for nlh in _nlmsg.nlmsg_iter(memoryview(buf)[20:])], [1, 2])
+        # truncated
+        self.assertEqual([nlh.nlmsg_seq for nlh in _nlmsg.nlmsg_iter(buf[:56])], [0, 1])
+        self.assertEqual(list(_nlmsg.nlmsg_iter(bytearray(15))), [])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,75 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import sys, unittest, ctypes
+
+import cpylmnl.linux.netlinkh as netlink
+from cpylmnl import nlstruct, _nlmsg, _attr, _libmnlh
+
+from .linux.netlink.buf import *
+
+
+class TestSuite(unittest.TestCase):
+    def test_array_type_cache(self):
+        c = nlstruct.ArrayTypeCache(maxsize=2)
+        t4 = c.get(4)
+        self.assertTrue(issubclass(t4, ctypes.Array))
+        self.assertEqual(ctypes.sizeof(t4), 4)
+        self.assertIs(c.get(4), t4)
+        self.assertEqual((c.hits, c.misses, c.evictions), (1, 1, 0))
+
+        c.get(8)
+        c.get(4) # 8 is the least recently used
+        c.get(16)
+        self.assertEqual((c.hits, c.misses, c.evictions), (2, 3, 1))
+        self.assertEqual(len(c), 2)
+        self.assertIs(c.get(4), t4)
+        self.assertIsNot(c.get(8), None)
+        self.assertEqual(c.evictions, 2)
+
+        t = c.get(2, ctypes.c_uint32)
+        self.assertEqual(ctypes.sizeof(t), 8)
+        c.clear()
+        self.assertEqual(len(c), 0)
+
+        # nothing is kept
+        c = nlstruct.ArrayTypeCache(maxsize=0)
+        self.assertEqual(ctypes.sizeof(c.get(4)), 4)
+        self.assertIsNot(c.get(4), c.get(4))
+        self.assertEqual(len(c), 0)
+        self.assertEqual((c.hits, c.misses, c.evictions), (0, 3, 0))
+
+
+    def test_ubyte_array(self):
+        buf = bytearray(b"abcdefgh")
+        a = nlstruct.ubyte_array_of(buf)
+        a[0] = ord("z")
+        self.assertEqual(buf[0], ord("z"))
+        b = nlstruct.ubyte_array_at(ctypes.addressof(a) + 2, 3)
+        self.assertEqual(bytearray(b), b"cde")
+
+
+    def test_helpers_no_pointer_type(self):
+        hbuf = NlmsghdrBuf(256)
+        nlh = _nlmsg.nlmsg_put_header(hbuf, netlink.Nlmsghdr)
+        _attr.attr_put_u32(nlh, 1, 0x12345678)
+        _attr.attr_put_strz(nlh, 2, b"abc")
+        n = len(ctypes._pointer_type_cache)
+        misses = nlstruct.ARRAY_TYPES.misses
+        for i in range(3):
+            attr = _nlmsg.nlmsg_get_payload_as(nlh, netlink.Nlattr)
+            self.assertEqual(attr.nla_type, 1)
+            self.assertEqual(bytearray(_attr.attr_get_payload_v(attr)), b"\x78\x56\x34\x12")
+            self.assertEqual(_attr.attr_get_payload_as(attr, ctypes.c_uint32).value, 0x12345678)
+            self.assertEqual(len(_nlmsg.nlmsg_get_payload_v(nlh)), 16)
+            self.assertEqual(len(_nlmsg.nlmsg_get_payload_offset_v(nlh, 8)), 8)
+            attr = _nlmsg.nlmsg_get_payload_offset_as(nlh, 8, netlink.Nlattr)
+            self.assertEqual(attr.nla_type, 2)
+        self.assertEqual(len(ctypes._pointer_type_cache), n)
+        self.assertTrue(nlstruct.ARRAY_TYPES.misses - misses <= 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
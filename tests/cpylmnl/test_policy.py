@@ -0,0 +1,126 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import sys, random, unittest, struct, errno
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.genetlinkh as genl
+from cpylmnl import _attr, _libmnlh, _policy, _intern
+
+from .linux.netlink.buf import *
+
+
+def attr_bytes(attr_type, payload):
+    abuf = NlattrBuf(_libmnlh.MNL_ALIGN(_libmnlh.MNL_ATTR_HDRLEN + len(payload)))
+    abuf.len = _libmnlh.MNL_ATTR_HDRLEN + len(payload)
+    abuf.type = attr_type
+    abuf[_libmnlh.MNL_ATTR_HDRLEN:abuf.len] = payload
+    return abuf
+
+
+def nlmsg_bytes(payload):
+    hbuf = NlmsghdrBuf(bytearray(_libmnlh.MNL_NLMSG_HDRLEN) + payload)
+    hbuf.len = len(hbuf)
+    return hbuf
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        grp = _policy.AttrPolicy(genl.CTRL_ATTR_MCAST_GRP_MAX, {
+            genl.CTRL_ATTR_MCAST_GRP_ID:	_libmnlh.MNL_TYPE_U32,
+            genl.CTRL_ATTR_MCAST_GRP_NAME:	_libmnlh.MNL_TYPE_STRING,
+        })
+        self.policy = _policy.AttrPolicy(genl.CTRL_ATTR_MAX, {
+            genl.CTRL_ATTR_FAMILY_ID:		_libmnlh.MNL_TYPE_U16,
+            genl.CTRL_ATTR_FAMILY_NAME:		_libmnlh.MNL_TYPE_NUL_STRING,
+            genl.CTRL_ATTR_VERSION:		_libmnlh.MNL_TYPE_U32,
+            genl.CTRL_ATTR_HDRSIZE:		(_libmnlh.MNL_TYPE_BINARY, 4),
+            genl.CTRL_ATTR_MCAST_GROUPS:	_policy.NestedArray(grp),
+        })
+        self.grp = grp
+
+
+    def test_decode(self):
+        groups = attr_bytes(1 | netlink.NLA_F_NESTED,
+                            attr_bytes(genl.CTRL_ATTR_MCAST_GRP_ID, struct.pack("I", 3))
+                            + attr_bytes(genl.CTRL_ATTR_MCAST_GRP_NAME, b"notify\0"))
+        groups += attr_bytes(2 | netlink.NLA_F_NESTED,
+                             attr_bytes(genl.CTRL_ATTR_MCAST_GRP_ID, struct.pack("I", 4)))
+        hbuf = nlmsg_bytes(bytearray(4)
+                           + attr_bytes(genl.CTRL_ATTR_FAMILY_ID, struct.pack("H", 0x10))
+                           + attr_bytes(genl.CTRL_ATTR_FAMILY_NAME, b"nlctrl\0")
+                           + attr_bytes(genl.CTRL_ATTR_HDRSIZE, b"\1\2\3\4")
+                           + attr_bytes(genl.CTRL_ATTR_MAX + 1, b"ignored")
+                           + attr_bytes(genl.CTRL_ATTR_MCAST_GROUPS | netlink.NLA_F_NESTED, groups))
+        nlh = netlink.Nlmsghdr.from_buffer(hbuf)
+        self.assertEqual(self.policy.decode(nlh, 4), {
+            genl.CTRL_ATTR_FAMILY_ID: 0x10,
+            genl.CTRL_ATTR_FAMILY_NAME: b"nlctrl",
+            genl.CTRL_ATTR_HDRSIZE: b"\1\2\3\4",
+            genl.CTRL_ATTR_MCAST_GROUPS: [
+                {genl.CTRL_ATTR_MCAST_GRP_ID: 3, genl.CTRL_ATTR_MCAST_GRP_NAME: b"notify"},
+                {genl.CTRL_ATTR_MCAST_GRP_ID: 4}]})
+
+
+    def test_decode_nested(self):
+        abuf = attr_bytes(genl.CTRL_ATTR_MCAST_GRP_ID, struct.pack("I", 7))
+        nest = attr_bytes(1 | netlink.NLA_F_NESTED, abuf)
+        attr = netlink.Nlattr.from_buffer(nest)
+        self.assertEqual(self.grp.decode_nested(attr), {genl.CTRL_ATTR_MCAST_GRP_ID: 7})
+        self.assertEqual(self.grp.decode_nested(memoryview(abuf)), {genl.CTRL_ATTR_MCAST_GRP_ID: 7})
+
+
+    def test_intern(self):
+        t = _intern.InternTable()
+        p = _policy.AttrPolicy(genl.CTRL_ATTR_MCAST_GRP_MAX, {
+            genl.CTRL_ATTR_MCAST_GRP_NAME:	_libmnlh.MNL_TYPE_STRING,
+        }, intern=t)
+        abuf = attr_bytes(genl.CTRL_ATTR_MCAST_GRP_NAME, b"notify\0")
+        name = p.decode_payload(abuf)[genl.CTRL_ATTR_MCAST_GRP_NAME]
+        self.assertEqual(name, b"notify")
+        self.assertIs(p.decode_payload(bytearray(abuf))[genl.CTRL_ATTR_MCAST_GRP_NAME], name)
+        self.assertEqual((t.hits, t.misses), (1, 1))
+
+
+    def test_compile_error(self):
+        self.assertRaises(ValueError, _policy.AttrPolicy, 1, {2: _libmnlh.MNL_TYPE_U8})
+        self.assertRaises(ValueError, _policy.AttrPolicy, 1, {1: _libmnlh.MNL_TYPE_MAX})
+
+
+    def test_validate_same_as_libmnl(self):
+        # compare with mnl_attr_validate(2)() for each data type and length
+        for data_type in range(_libmnlh.MNL_TYPE_MAX):
+            for exp_len in (None, 0, 2, 4):
+                if exp_len is None:
+                    p = _policy.AttrPolicy(1, {1: data_type})
+                else:
+                    p = _policy.AttrPolicy(1, {1: (data_type, exp_len)})
+                for plen in range(0, 10):
+                    payload = bytearray([random.randrange(1, 255) for i in range(plen)])
+                    if plen and random.randrange(2): payload[-1] = 0
+                    abuf = attr_bytes(1, payload)
+                    attr = netlink.Nlattr.from_buffer(abuf)
+                    try:
+                        if exp_len is None:
+                            _attr.attr_validate(attr, data_type)
+                        else:
+                            _attr.attr_validate2(attr, data_type, exp_len)
+                    except OSError as e:
+                        expected = e.errno
+                    else:
+                        expected = 0
+                        # decoder does not read an integer beyond payload
+                        if plen < _policy._data_type_len.get(data_type, 0):
+                            expected = errno.ERANGE
+                    try:
+                        p.decode_payload(abuf)
+                    except OSError as e:
+                        self.assertEqual(e.errno, expected, (data_type, exp_len, plen))
+                    else:
+                        self.assertEqual(0, expected, (data_type, exp_len, plen))
+
+
+if __name__ == '__main__':
+    unittest.main()
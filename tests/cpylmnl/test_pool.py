@@ -0,0 +1,107 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import unittest, ctypes, mmap, gc
+
+import cpylmnl.linux.netlinkh as netlink
+from cpylmnl import _pool
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.pool = _pool.BufferPool(100, 2)
+
+
+    def test_size(self):
+        self.assertEqual(self.pool.size, mmap.PAGESIZE)
+        buf = self.pool.lease()
+        self.assertEqual(len(buf), mmap.PAGESIZE)
+        self.assertEqual(ctypes.addressof(buf) % mmap.PAGESIZE, 0)
+
+
+    def test_lease(self):
+        b1 = self.pool.lease()
+        b2 = self.pool.lease()
+        self.assertEqual((self.pool.hits, self.pool.misses, self.pool.exhausted), (0, 2, 0))
+        self.assertEqual(self.pool.in_use(), 2)
+
+        b3 = self.pool.lease()
+        self.assertEqual((self.pool.hits, self.pool.misses, self.pool.exhausted), (0, 2, 1))
+        self.assertEqual(self.pool.in_use(), 2)
+
+        addr = ctypes.addressof(b1)
+        del b1, b3
+        gc.collect()
+        self.assertEqual(self.pool.in_use(), 1)
+        self.assertEqual(self.pool.available(), 1)
+
+        b1 = self.pool.lease()
+        self.assertEqual(ctypes.addressof(b1), addr)
+        self.assertEqual((self.pool.hits, self.pool.misses, self.pool.exhausted), (1, 2, 1))
+
+
+    def test_release_by_derived(self):
+        buf = self.pool.lease()
+        v = memoryview(buf)[:netlink.NLMSG_HDRLEN]
+        nlh = netlink.Nlmsghdr(v)
+        del buf, v
+        gc.collect()
+        self.assertEqual(self.pool.in_use(), 1)
+        del nlh
+        gc.collect()
+        self.assertEqual(self.pool.in_use(), 0)
+        self.assertEqual(self.pool.available(), 1)
+
+        self.pool.clear()
+        self.assertEqual(self.pool.available(), 0)
+        self.pool.lease()
+        self.assertEqual(self.pool.misses, 2)
+
+
+    def test_resize(self):
+        buf = self.pool.lease()
+        b2 = self.pool.lease()
+        del buf
+        self.assertEqual(self.pool.available(), 1)
+        self.pool.resize(mmap.PAGESIZE + 1)
+        self.assertEqual(self.pool.size, mmap.PAGESIZE * 2)
+        self.assertEqual(self.pool.available(), 0)
+        self.assertEqual(self.pool.resizes, 1)
+        self.assertEqual(len(self.pool.lease()), mmap.PAGESIZE * 2)
+        self.assertEqual(self.pool.available(), 1)
+        # released in old size
+        del b2
+        self.assertEqual(self.pool.available(), 1)
+        self.assertEqual(self.pool.in_use(), 0)
+
+
+    def test_adapt(self):
+        pool = _pool.BufferPool(mmap.PAGESIZE, 2, mmap.PAGESIZE * 4)
+        # fit in
+        pool.adapt(mmap.PAGESIZE // 2)
+        self.assertEqual(pool.size, mmap.PAGESIZE)
+        # too large, over max_size
+        pool.adapt(mmap.PAGESIZE * 5 + 1)
+        self.assertEqual(pool.size, mmap.PAGESIZE * 6)
+
+        pool = _pool.BufferPool(mmap.PAGESIZE, 2, mmap.PAGESIZE * 4)
+        # dump like, grows up to max_size
+        for i in range(4):
+            pool.adapt(pool.size - 1)
+        self.assertEqual(pool.size, mmap.PAGESIZE * 4)
+
+        # event like, shrinks down to initial size
+        for i in range(pool.SHRINK_AFTER - 1):
+            pool.adapt(16)
+        self.assertEqual(pool.size, mmap.PAGESIZE * 4)
+        pool.adapt(16)
+        self.assertEqual(pool.size, mmap.PAGESIZE * 2)
+        for i in range(pool.SHRINK_AFTER * 2):
+            pool.adapt(16)
+        self.assertEqual(pool.size, mmap.PAGESIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import sys, unittest, struct, socket
+
+import cpylmnl.linux.netfilter.nfnetlinkh as nfnl
+import cpylmnl.linux.netfilter.nfnetlink_conntrackh as nfnlct
+from cpylmnl import _libmnlh, _query
+
+from .test_view import build_ct
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.buf = bytearray(512)
+        self.nlh = build_ct(self.buf)
+
+
+    def test_run(self):
+        q = _query.AttrQuery(("CTA_TUPLE_ORIG/CTA_TUPLE_IP/CTA_IP_V4_SRC",
+                              ("CTA_TUPLE_ORIG/CTA_TUPLE_IP/CTA_IP_V4_DST", _libmnlh.MNL_TYPE_U32),
+                              ("CTA_COUNTERS_ORIG/CTA_COUNTERS_BYTES", _libmnlh.MNL_TYPE_U64),
+                              "CTA_TUPLE_REPLY/CTA_TUPLE_IP/CTA_IP_V4_SRC",
+                              (nfnlct.CTA_MARK, ),
+                              ((nfnlct.CTA_TUPLE_ORIG, nfnlct.CTA_TUPLE_PROTO, nfnlct.CTA_PROTO_NUM),
+                               _libmnlh.MNL_TYPE_U8)),
+                             nfnlct)
+        src, dst, nbytes, reply, mark, proto = q.run(self.nlh, nfnl.Nfgenmsg.csize())
+        self.assertEqual(bytearray(src), struct.pack("I", 0x0100007f))
+        self.assertEqual(dst, 0x0200007f)
+        self.assertEqual(nbytes, 180)
+        self.assertIsNone(reply)
+        self.assertEqual(bytearray(mark), struct.pack("I", 7))
+        self.assertEqual(proto, socket.IPPROTO_TCP)
+
+        # a nest out of paths is not walked
+        q = _query.AttrQuery((("CTA_MARK", _libmnlh.MNL_TYPE_U32), ), nfnlct)
+        walked = []
+        _walk = q._walk
+        def walk(v, offset, end, node, ret):
+            walked.append(node)
+            return _walk(v, offset, end, node, ret)
+        q._walk = walk
+        self.assertEqual(q.run(self.nlh, nfnl.Nfgenmsg.csize()), [7])
+        self.assertEqual(walked, [q._root])
+
+
+    def test_run_payload(self):
+        q = _query.AttrQuery((("CTA_COUNTERS_ORIG/CTA_COUNTERS_PACKETS", _libmnlh.MNL_TYPE_U64), ), nfnlct)
+        offset = _libmnlh.MNL_NLMSG_HDRLEN + nfnl.Nfgenmsg.csize()
+        self.assertEqual(q.run_payload(memoryview(self.buf)[offset:self.nlh.nlmsg_len]), [3])
+
+
+    def test_compile_error(self):
+        self.assertRaises(ValueError, _query.AttrQuery, ("CTA_NOSUCH", ), nfnlct)
+        self.assertRaises(ValueError, _query.AttrQuery, ("CTA_MARK", ))
+        self.assertRaises(ValueError, _query.AttrQuery, ("CTA_MARK", "CTA_MARK"), nfnlct)
+        self.assertRaises(ValueError, _query.AttrQuery,
+                          ("CTA_TUPLE_ORIG", "CTA_TUPLE_ORIG/CTA_TUPLE_IP"), nfnlct)
+        self.assertRaises(ValueError, _query.AttrQuery,
+                          ("CTA_TUPLE_ORIG/CTA_TUPLE_IP", "CTA_TUPLE_ORIG"), nfnlct)
+
+
+if __name__ == '__main__':
+    unittest.main()
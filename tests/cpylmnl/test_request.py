@@ -0,0 +1,107 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import unittest, errno, socket
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.rtnetlinkh as rtnl
+from cpylmnl import _socket, _nlmsg, _libmnlh, _request
+
+from .linux.netlink.buf import *
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.nl = _socket.socket_open(netlink.NETLINK_ROUTE)
+        _socket.socket_bind(self.nl, 0, _libmnlh.MNL_SOCKET_AUTOPID)
+        self.engine = _request.RequestEngine(self.nl, window=8)
+
+    def tearDown(self):
+        _socket.socket_close(self.nl)
+
+    def put_header(self, nlmsg_type, flags=0):
+        buf = bytearray(_libmnlh.MNL_SOCKET_BUFFER_SIZE)
+        nlh = _nlmsg.nlmsg_put_header(buf, netlink.Nlmsghdr)
+        nlh.nlmsg_type = nlmsg_type
+        nlh.nlmsg_flags = netlink.NLM_F_REQUEST | flags
+        return nlh
+
+
+    def test_pipeline(self):
+        done = []
+        reqs = [self.engine.submit(self.put_header(netlink.NLMSG_NOOP), done.append)
+                for i in range(100)]
+        self.assertTrue(self.engine.inflight() <= 8)
+        self.engine.flush()
+        self.assertEqual(self.engine.inflight(), 0)
+        self.assertEqual(done, reqs)
+        self.assertEqual(len(set(r.seq for r in reqs)), 100)
+        self.assertEqual([r.error for r in reqs], [0] * 100)
+        self.assertEqual(self.engine.unmatched, 0)
+        self.assertEqual(self.engine.process(0), 0)
+
+
+    def test_error(self):
+        nlh = self.put_header(rtnl.RTM_GETLINK)
+        ifm = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Ifinfomsg)
+        ifm.ifi_index = 0x7fffffff
+        req = self.engine.wait(self.engine.submit(nlh))
+        self.assertEqual(req.error, errno.ENODEV)
+        try:
+            req.check()
+        except OSError as e:
+            self.assertEqual(e.errno, errno.ENODEV)
+        else:
+            self.fail("not raise OSError")
+
+
+    def test_dump(self):
+        nlh = self.put_header(rtnl.RTM_GETLINK, netlink.NLM_F_DUMP)
+        rt = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Rtgenmsg)
+        rt.rtgen_family = socket.AF_PACKET
+        noop = self.engine.submit(self.put_header(netlink.NLMSG_NOOP))
+        dump = self.engine.submit(nlh)
+        self.engine.wait(dump)
+        self.assertTrue(noop.done())
+        self.assertEqual(noop.replies, [])
+        self.assertEqual(dump.error, 0)
+        self.assertTrue(len(dump.replies) > 0)
+        self.assertEqual(set(r.nlmsg_type for r in dump.replies), set([rtnl.RTM_NEWLINK]))
+
+
+
+    def test_dump_intr(self):
+        # pretend an interrupted dump message from another socket, ahead of
+        # the replies to the next request
+        seq = (self.engine._seq + 1) & 0xffffffff or 1
+        hbuf = NlmsghdrBuf(16)
+        hbuf.len = 16
+        hbuf.type = rtnl.RTM_NEWLINK
+        hbuf.flags = netlink.NLM_F_MULTI | netlink.NLM_F_DUMP_INTR
+        hbuf.seq = seq
+        s = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, netlink.NETLINK_ROUTE)
+        try:
+            s.sendto(hbuf, (self.engine.portid, 0))
+        except socket.error as e:
+            self.skipTest("could not send to user socket: %s" % e)
+        finally:
+            s.close()
+
+        nlh = self.put_header(rtnl.RTM_GETLINK, netlink.NLM_F_DUMP)
+        rt = _nlmsg.nlmsg_put_extra_header_as(nlh, rtnl.Rtgenmsg)
+        rt.rtgen_family = socket.AF_PACKET
+        dump = self.engine.submit(nlh)
+        self.assertEqual(dump.seq, seq)
+        self.engine.wait(dump)
+        self.assertTrue(dump.interrupted)
+        self.assertEqual(dump.error, errno.EINTR)
+        self.assertEqual(dump.replies, [])
+        # the rest of the dump has been consumed
+        self.assertEqual(self.engine.unmatched, 0)
+        self.assertEqual(self.engine.process(0), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
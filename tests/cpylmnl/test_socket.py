@@ -10,6 +10,7 @@ import re, platform
 
 import cpylmnl.linux.netlinkh as netlink
 import cpylmnl as mnl
+from cpylmnl import _socket, _nlmsg, _libmnlh, _pool
 
 
 class TestSuite(unittest.TestCase):
@@ -116,5 +117,123 @@ class TestSuiteFd(TestSuite):
         self.kernel_version = tuple([int(i) for i in m.groups()])
 
 
+class TestSuiteMany(unittest.TestCase):
+    """multi datagram functions, by the plain socket_ functions
+    """
+    def setUp(self):
+        self.nl = _socket.socket_open(netlink.NETLINK_ROUTE)
+        _socket.socket_bind(self.nl, 0, _libmnlh.MNL_SOCKET_AUTOPID)
+        self.portid = _socket.socket_get_portid(self.nl)
+
+    def tearDown(self):
+        _socket.socket_close(self.nl)
+
+    def noop_ack(self, seq):
+        buf = bytearray(_libmnlh.MNL_NLMSG_HDRLEN)
+        nlh = _nlmsg.nlmsg_put_header(buf)
+        nlh.nlmsg_type = netlink.NLMSG_NOOP
+        nlh.nlmsg_flags = netlink.NLM_F_REQUEST|netlink.NLM_F_ACK
+        nlh.nlmsg_seq = seq
+        return buf
+
+    def test_recv_many(self):
+        for i in range(3):
+            _socket.socket_sendto(self.nl, self.noop_ack(100 + i))
+
+        bufs = [bytearray(256) for i in range(4)]
+        lens = _socket.socket_recv_many(self.nl, bufs)
+        self.assertEqual(lens, [(36, 0)] * 3)
+        for i in range(3):
+            nlh = netlink.Nlmsghdr(bufs[i])
+            self.assertEqual(nlh.nlmsg_type, netlink.NLMSG_ERROR)
+            self.assertEqual(nlh.nlmsg_seq, 100 + i)
+            self.assertEqual(nlh.nlmsg_pid, self.portid)
+            self.assertEqual(netlink.Nlmsgerr(bufs[i], _libmnlh.MNL_NLMSG_HDRLEN).error, 0)
+
+    def test_send_many(self):
+        bufs = [self.noop_ack(200 + i) for i in range(2)]
+        bufs.append(netlink.Nlmsghdr(self.noop_ack(202)))
+        self.assertEqual(_socket.socket_send_many(self.nl, bufs), 3)
+
+        rbufs = [bytearray(256) for i in range(4)]
+        self.assertEqual(_socket.socket_recv_many(self.nl, rbufs), [(36, 0)] * 3)
+        self.assertEqual([netlink.Nlmsghdr(b).nlmsg_seq for b in rbufs[:3]], [200, 201, 202])
+
+    def test_sendmsg(self):
+        # header, attribute header and payload in separate buffers
+        payload = b"\x01\x02\x03\x04" * 64
+        attr = bytearray(struct.pack("=HH", _libmnlh.MNL_ATTR_HDRLEN + len(payload), 1))
+        hdr = self.noop_ack(500)
+        msglen = len(hdr) + len(attr) + len(payload)
+        struct.pack_into("=I", hdr, 0, msglen)
+        pieces = [hdr, attr, memoryview(payload)[:128], b"", payload[128:]]
+        self.assertEqual(_socket.socket_sendmsg(self.nl, pieces), msglen)
+
+        buf = bytearray(512)
+        _socket.socket_recv_into(self.nl, buf)
+        rnlh = netlink.Nlmsghdr(buf)
+        self.assertEqual(rnlh.nlmsg_type, netlink.NLMSG_ERROR)
+        self.assertEqual(rnlh.nlmsg_seq, 500)
+        err = netlink.Nlmsgerr(buf, _libmnlh.MNL_NLMSG_HDRLEN)
+        self.assertEqual(err.error, 0)
+        self.assertEqual(err.msg.nlmsg_len, msglen)
+
+        # a whole message in Nlmsghdr
+        nlh = netlink.Nlmsghdr(self.noop_ack(501))
+        self.assertEqual(_socket.socket_sendmsg(self.nl, [nlh]), nlh.nlmsg_len)
+        _socket.socket_recv_into(self.nl, buf)
+        self.assertEqual(netlink.Nlmsghdr(buf).nlmsg_seq, 501)
+
+    def test_recv_view(self):
+        buf = bytearray(256)
+        _socket.socket_sendto(self.nl, self.noop_ack(300))
+        v = _socket.socket_recv_view(self.nl, buf)
+        self.assertTrue(isinstance(v, memoryview))
+        self.assertEqual(len(v), 36)
+        self.assertEqual(netlink.Nlmsghdr(v).nlmsg_seq, 300)
+
+        # buf is reused
+        _socket.socket_sendto(self.nl, self.noop_ack(301))
+        v2 = _socket.socket_recv_view(self.nl, buf)
+        self.assertEqual(netlink.Nlmsghdr(v).nlmsg_seq, 301)
+        self.assertEqual(bytearray(v), bytearray(v2))
+
+    def test_recv_pooled(self):
+        pool = _pool.BufferPool(count=1)
+        _socket.socket_sendto(self.nl, self.noop_ack(400))
+        v = _socket.socket_recv_pooled(self.nl, pool)
+        self.assertEqual(len(v), 36)
+        self.assertEqual(netlink.Nlmsghdr(v).nlmsg_seq, 400)
+        self.assertEqual(pool.in_use(), 1)
+        del v
+        self.assertEqual(pool.in_use(), 0)
+
+    def test_recv_auto(self):
+        pool = _pool.BufferPool(count=1)
+        _socket.socket_sendto(self.nl, self.noop_ack(500))
+        self.assertEqual(_socket.socket_recv_pending(self.nl), 36)
+        self.assertEqual(_socket.socket_recv_pending(self.nl), 36)
+        v = _socket.socket_recv_auto(self.nl, pool)
+        self.assertEqual(netlink.Nlmsghdr(v).nlmsg_seq, 500)
+
+    def test_recv_many_trunc(self):
+        _socket.socket_sendto(self.nl, self.noop_ack(1))
+        try:
+            _socket.socket_recv_many(self.nl, [bytearray(16)])
+        except OSError as e:
+            self.assertEqual(e.errno, errno.ENOSPC)
+        else:
+            self.fail("not raise OSError")
+
+        # the others than a truncated one are returned
+        for i in range(3):
+            _socket.socket_sendto(self.nl, self.noop_ack(600 + i))
+        bufs = [bytearray(256), bytearray(16), bytearray(256)]
+        self.assertEqual(_socket.socket_recv_many(self.nl, bufs), 
+                         [(36, 0), (16, errno.ENOSPC), (36, 0)])
+        self.assertEqual(netlink.Nlmsghdr(bufs[0]).nlmsg_seq, 600)
+        self.assertEqual(netlink.Nlmsghdr(bufs[2]).nlmsg_seq, 602)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,77 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import sys, unittest, struct, socket
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.netfilter.nfnetlinkh as nfnl
+import cpylmnl.linux.netfilter.nfnetlink_queueh as nfqnl
+import cpylmnl.linux.netfilter.nfnetlink_conntrackh as nfnlct
+from cpylmnl import _builder, _template, _view
+
+from .test_view import build_ct
+
+
+def build_verdict(buf, seq, packet_id, verdict):
+    b = _builder.NlmsgBuilder(buf)
+    b.put_header((nfnl.NFNL_SUBSYS_QUEUE << 8) | nfqnl.NFQNL_MSG_VERDICT,
+                 netlink.NLM_F_REQUEST, seq)
+    nfg = b.put_extra_header_as(nfnl.Nfgenmsg)
+    nfg.nfgen_family = socket.AF_UNSPEC
+    nfg.version = nfnl.NFNETLINK_V0
+    nfg.res_id = socket.htons(3)
+    b.put(nfqnl.NFQA_VERDICT_HDR, struct.pack(">II", verdict, packet_id))
+    return b
+
+
+class TestSuite(unittest.TestCase):
+    def test_patch(self):
+        b = build_verdict(bytearray(256), 0, 0, 0)
+        t = _template.NlmsgTemplate(b.nlmsghdr(), nfnl.Nfgenmsg.csize())
+        t.header_slot("seq", "nlmsg_seq")
+        t.attr_slot("verdict", nfqnl.NFQA_VERDICT_HDR, ">I")
+        t.attr_slot("id", nfqnl.NFQA_VERDICT_HDR, ">I", 4)
+        self.assertEqual(len(t.buf), b.nlmsg_len)
+
+        for seq, packet_id, verdict in ((1, 10, 1), (2, 11, 0), (0xffffffff, 12, 1)):
+            buf = t.patch(seq=seq, id=packet_id, verdict=verdict)
+            self.assertIs(buf, t.buf)
+            expected = build_verdict(bytearray(256), seq, packet_id, verdict)
+            self.assertEqual(buf, expected.buf[:expected.nlmsg_len])
+        self.assertEqual(t.nlmsghdr().nlmsg_seq, 0xffffffff)
+
+        # a part of slots
+        t.patch(id=20)
+        expected = build_verdict(bytearray(256), 0xffffffff, 20, 1)
+        self.assertEqual(t.buf, expected.buf[:expected.nlmsg_len])
+
+
+    def test_nested(self):
+        nlh = build_ct(bytearray(512))
+        t = _template.NlmsgTemplate(nlh, nfnl.Nfgenmsg.csize())
+        t.attr_slot("src", (nfnlct.CTA_TUPLE_ORIG, nfnlct.CTA_TUPLE_IP, nfnlct.CTA_IP_V4_SRC), "=I")
+        t.attr_slot("mark", nfnlct.CTA_MARK, "=I")
+        t.patch(src=0x0a00000a, mark=9)
+        nlh = t.nlmsghdr()
+        v = _view.AttrView.from_nlmsg(nlh, nfnl.Nfgenmsg.csize())
+        self.assertEqual(v[nfnlct.CTA_TUPLE_ORIG][nfnlct.CTA_TUPLE_IP].get_u32(nfnlct.CTA_IP_V4_SRC),
+                         0x0a00000a)
+        self.assertEqual(v[nfnlct.CTA_TUPLE_ORIG][nfnlct.CTA_TUPLE_IP].get_u32(nfnlct.CTA_IP_V4_DST),
+                         0x0200007f)
+        self.assertEqual(v.get_u32(nfnlct.CTA_MARK), 9)
+
+
+    def test_slot_error(self):
+        b = build_verdict(bytearray(256), 0, 0, 0)
+        t = _template.NlmsgTemplate(b.buf[:b.nlmsg_len], nfnl.Nfgenmsg.csize())
+        self.assertRaises(ValueError, t.slot, "x", b.nlmsg_len - 2, "=I")
+        self.assertRaises(ValueError, t.slot, "x", 0, "=II")
+        self.assertRaises(ValueError, t.attr_slot, "x", nfqnl.NFQA_VERDICT_HDR, ">I", 6)
+        self.assertRaises(ValueError, t.attr_slot, "x", nfqnl.NFQA_MARK, ">I")
+        self.assertRaises(KeyError, t.patch, x=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+#! /usr/bin/env python
+# -*- coding:utf-8 -*-
+
+from __future__ import print_function
+
+import sys, unittest, struct, socket
+
+import cpylmnl.linux.netlinkh as netlink
+import cpylmnl.linux.netfilter.nfnetlinkh as nfnl
+import cpylmnl.linux.netfilter.nfnetlink_conntrackh as nfnlct
+from cpylmnl import _attr, _nlmsg, _libmnlh, _view, _intern
+
+
+def build_ct(buf):
+    # a part of conntrack entry by libmnl
+    nlh = _nlmsg.nlmsg_put_header(buf, netlink.Nlmsghdr)
+    _nlmsg.nlmsg_put_extra_header_as(nlh, nfnl.Nfgenmsg)
+
+    nest1 = _attr.attr_nest_start(nlh, nfnlct.CTA_TUPLE_ORIG)
+    nest2 = _attr.attr_nest_start(nlh, nfnlct.CTA_TUPLE_IP)
+    _attr.attr_put_u32(nlh, nfnlct.CTA_IP_V4_SRC, 0x0100007f)
+    _attr.attr_put_u32(nlh, nfnlct.CTA_IP_V4_DST, 0x0200007f)
+    _attr.attr_nest_end(nlh, nest2)
+    nest2 = _attr.attr_nest_start(nlh, nfnlct.CTA_TUPLE_PROTO)
+    _attr.attr_put_u8(nlh, nfnlct.CTA_PROTO_NUM, socket.IPPROTO_TCP)
+    _attr.attr_nest_end(nlh, nest2)
+    _attr.attr_nest_end(nlh, nest1)
+
+    nest1 = _attr.attr_nest_start(nlh, nfnlct.CTA_COUNTERS_ORIG)
+    _attr.attr_put_u64(nlh, nfnlct.CTA_COUNTERS_PACKETS, 3)
+    _attr.attr_put_u64(nlh, nfnlct.CTA_COUNTERS_BYTES, 180)
+    _attr.attr_nest_end(nlh, nest1)
+    _attr.attr_put_u32(nlh, nfnlct.CTA_MARK, 7)
+    nest1 = _attr.attr_nest_start(nlh, nfnlct.CTA_HELP)
+    _attr.attr_put_strz(nlh, nfnlct.CTA_HELP_NAME, b"ftp")
+    _attr.attr_nest_end(nlh, nest1)
+    return nlh
+
+
+class TestSuite(unittest.TestCase):
+    def setUp(self):
+        self.buf = bytearray(512)
+        self.nlh = build_ct(self.buf)
+        self.view = _view.AttrView.from_nlmsg(self.nlh, nfnl.Nfgenmsg.csize())
+
+
+    def test_get(self):
+        v = self.view
+        self.assertEqual(v.get_u32(nfnlct.CTA_MARK), 7)
+        self.assertEqual(v[nfnlct.CTA_HELP].get_str(nfnlct.CTA_HELP_NAME), b"ftp")
+        self.assertEqual(v[nfnlct.CTA_TUPLE_ORIG][nfnlct.CTA_TUPLE_IP].get_u32(nfnlct.CTA_IP_V4_SRC),
+                         0x0100007f)
+        self.assertEqual(v[nfnlct.CTA_TUPLE_ORIG][nfnlct.CTA_TUPLE_PROTO].get_u8(nfnlct.CTA_PROTO_NUM),
+                         socket.IPPROTO_TCP)
+        self.assertEqual(v[nfnlct.CTA_COUNTERS_ORIG].get_u64(nfnlct.CTA_COUNTERS_BYTES), 180)
+        self.assertEqual(v.get_be32(nfnlct.CTA_MARK), socket.htonl(7))
+        self.assertEqual(v[nfnlct.CTA_COUNTERS_ORIG].get_be64(nfnlct.CTA_COUNTERS_BYTES),
+                         struct.unpack(">Q", struct.pack("=Q", 180))[0])
+        self.assertEqual(len(v[nfnlct.CTA_TUPLE_ORIG][nfnlct.CTA_TUPLE_IP]), 2)
+        self.assertEqual(set(v), set([nfnlct.CTA_TUPLE_ORIG, nfnlct.CTA_COUNTERS_ORIG,
+                                      nfnlct.CTA_MARK, nfnlct.CTA_HELP]))
+
+
+    def test_get_addr(self):
+        ip = self.view[nfnlct.CTA_TUPLE_ORIG][nfnlct.CTA_TUPLE_IP]
+        t = _intern.InternTable()
+        src = ip.get_in_addr(nfnlct.CTA_IP_V4_SRC, t)
+        self.assertEqual(src, socket.inet_ntoa(struct.pack("I", 0x0100007f)))
+        self.assertIs(ip.get_in_addr(nfnlct.CTA_IP_V4_SRC, t), src)
+        self.assertEqual(ip.get_lladdr(nfnlct.CTA_IP_V4_DST),
+                         ":".join("%02x" % i for i in bytearray(struct.pack("I", 0x0200007f))))
+        self.assertRaises(OSError, ip.get_in6_addr, nfnlct.CTA_IP_V4_SRC)
+
+        names = _intern.InternTable()
+        help = self.view[nfnlct.CTA_HELP]
+        name = help.get_str(nfnlct.CTA_HELP_NAME, names)
+        self.assertEqual(name, b"ftp")
+        self.assertIs(help.get_str(nfnlct.CTA_HELP_NAME, names), name)
+
+
+    def test_missing(self):
+        v = self.view
+        self.assertFalse(nfnlct.CTA_TUPLE_REPLY in v)
+        self.assertRaises(KeyError, v.get_u32, nfnlct.CTA_TUPLE_REPLY)
+        self.assertRaises(KeyError, v.__getitem__, nfnlct.CTA_TUPLE_REPLY)
+        # nested index is bounded by the nest
+        self.assertFalse(nfnlct.CTA_MARK in v[nfnlct.CTA_COUNTERS_ORIG])
+
+
+    def test_lazy(self):
+        v = self.view
+        self.assertIsNone(v._tb)
+        ip = v[nfnlct.CTA_TUPLE_ORIG][nfnlct.CTA_TUPLE_IP]
+        self.assertIsNone(v[nfnlct.CTA_COUNTERS_ORIG]._tb)
+        self.assertIsNone(ip._tb)
+        # decoded from the buffer on access
+        struct.pack_into("I", self.buf, ip.offset(nfnlct.CTA_IP_V4_DST) + 4, 0x0300007f)
+        self.assertEqual(ip.get_u32(nfnlct.CTA_IP_V4_DST), 0x0300007f)
+        self.assertFalse(hasattr(v, "__dict__"))
+
+
+    def test_from_attr(self):
+        attr = self.view.get_attr(nfnlct.CTA_COUNTERS_ORIG)
+        self.assertEqual(_attr.attr_get_type(attr), nfnlct.CTA_COUNTERS_ORIG)
+        v = _view.AttrView.from_attr(attr)
+        self.assertEqual(v.get_u64(nfnlct.CTA_COUNTERS_PACKETS), 3)
+        self.assertEqual(bytearray(v.get_payload(nfnlct.CTA_COUNTERS_BYTES)), struct.pack("Q", 180))
+
+
+if __name__ == '__main__':
+    unittest.main()